@@ -1,11 +1,15 @@
 #!/usr/bin/env python
 #
 # License: MIT
-# Last Change: Thu Dec 19, 2019 at 05:33 PM -0500
+# Last Change: Sun Oct 18, 2026 at 09:50 AM +0000
 
 from pathlib import Path
 from collections import defaultdict
-from copy import deepcopy
+from argparse import ArgumentParser
+from io import StringIO
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, get_all_start_methods
 
 import re
 import sys
@@ -13,7 +17,6 @@ sys.path.insert(0, './pyUTM')
 
 from pyUTM.io import write_to_file, write_to_csv
 from pyUTM.io import csv_line
-from pyUTM.io import YamlReader
 from pyUTM.io import prepare_descr_for_xlsx_output, XLWriter
 from pyUTM.selection import SelectorPD, RulePD
 from pyUTM.datatype import NetNode
@@ -21,6 +24,14 @@ from pyUTM.common import flatten, transpose
 from pyUTM.common import jd_swapping_true
 from pyUTM.common import jd_swapping_mirror, jp_swapping_mirror
 from pyUTM.legacy import PADDING
+from backplane.cache import cached
+from backplane.descr import LayeredDescr
+from backplane.reader import read_brkoutbrd_pin_assignments
+from backplane.reader import read_flattened_descr
+from backplane.reader import flattener_source, reader_sources
+from backplane.brkoutbrd import BrkoutbrdIndex
+from backplane.selection import CompiledRulePD
+from backplane.instrument import profiler
 
 input_dir = Path('input')
 output_dir = Path('output')
@@ -59,12 +70,14 @@ dcb_mirror_excel_file = output_dir / Path('Mapping_DCB_MirrorType.xlsx')
 
 def check_diff_pairs_notes(pt_descr):
     for jp in pt_descr.keys():
+        references = {}
+        for pt_ref in pt_descr.where(jp, 'SEAM pin', lambda x: x is not None):
+            references.setdefault(pt_ref['Signal ID'], []).append(pt_ref)
+
         for pt in pt_descr[jp]:
             reference_id = pt['Signal ID'][:-1] + 'P'
 
-            for pt_ref in filter(lambda x: x['Signal ID'] == reference_id and
-                                 x['SEAM pin'] is not None,
-                                 pt_descr[jp]):
+            for pt_ref in references.get(reference_id, []):
 
                 # Quick and dirty error check to make sure both ends of the same
                 # differential pair are treated the same.
@@ -74,53 +87,112 @@ def check_diff_pairs_notes(pt_descr):
                     ))
 
 
-def match_diff_pairs(pt_descr, dcb_descr, net_name_ending):
+def index_pt_by_signal_id(pt_descr):
+    # Only the first PT pin connected to a DCB is kept for each signal, which is
+    # what the differential pair matching has always used as reference.
+    index = {}
     for jp in pt_descr.keys():
-        for idx, pt in filter(
-                lambda x: x[1]['Signal ID'] is not None and
-                x[1]['Signal ID'].endswith(net_name_ending),
-                enumerate(pt_descr[jp])
-        ):
-            reference_id = pt['Signal ID'][:-1] + 'P'
+        for pt in pt_descr[jp]:
+            if pt['SEAM pin'] is not None:
+                index.setdefault((jp, pt['Signal ID']), pt)
+    return index
+
+
+def index_dcb_by_pt_pin(dcb_descr):
+    index = {}
+    for jd in dcb_descr.keys():
+        for dcb in dcb_descr[jd]:
+            if dcb['Pigtail slot'] is not None:
+                index.setdefault(
+                    (jd, dcb['SEAM pin'], dcb['Pigtail slot'],
+                     dcb['Pigtail pin']),
+                    dcb)
+    return index
+
+
+def match_diff_pairs(pt_descr, dcb_descr,
+                     net_name_endings=[
+                         'SCL_N', 'SDA_N', 'RESET_N', 'THERMISTOR_N'
+                     ]):
+    # Both indices are built before any modification. This is safe because
+    # only the '_N' legs are renamed, and the references are always '_P' legs.
+    pt_index = index_pt_by_signal_id(pt_descr)
+    dcb_index = index_dcb_by_pt_pin(dcb_descr)
 
-            for pt_ref in filter(
-                    lambda x: x['Signal ID'] == reference_id and
-                    x['SEAM pin'] is not None,
-                    pt_descr[jp]
-            ):
-                jd = pt_ref['DCB slot']
+    for jp in pt_descr.keys():
+        for pt in pt_descr[jp]:
+            # The endings are resolved in order, as a renamed signal may end
+            # with one of the later endings.
+            for ending in net_name_endings:
+                if pt['Signal ID'] is None or \
+                        not pt['Signal ID'].endswith(ending):
+                    continue
+
+                reference_id = pt['Signal ID'][:-1] + 'P'
+                pt_ref = pt_index.get((jp, reference_id))
+                if pt_ref is None:
+                    continue
 
-                for dcb in dcb_descr[jd]:
-                    if pt_ref['SEAM pin'] == dcb['SEAM pin'] and \
-                       dcb['Pigtail slot'] is not None and \
-                       dcb['Pigtail slot'] == jp and \
-                       pt_ref['Pigtail pin'] == dcb['Pigtail pin']:
-                        # Modify pt_descr in place.
-                        pt_descr[jp][idx]['Signal ID'] = \
-                            jd + '_' + dcb['Signal ID'] + '_N'
-                        pt_descr[jp][idx]['DCB slot'] = jd
-                        break
-                break
+                jd = pt_ref['DCB slot']
+                dcb = dcb_index.get(
+                    (jd, pt_ref['SEAM pin'], jp, pt_ref['Pigtail pin']))
+                if dcb is not None:
+                    # Modify pt_descr in place.
+                    pt['Signal ID'] = jd + '_' + dcb['Signal ID'] + '_N'
+                    pt['DCB slot'] = jd
 
 
 def match_dcb_side_signal_id(pt_descr, dcb_descr):
+    # Position of the first DCB pin of a connector connected to a PT pin.
+    dcb_index = {}
+    for jd in dcb_descr.keys():
+        for pos, dcb in enumerate(dcb_descr[jd]):
+            if dcb['Pigtail slot'] is not None:
+                dcb_index.setdefault(
+                    (jd, dcb['SEAM pin'], dcb['Pigtail slot'],
+                     dcb['Pigtail pin']),
+                    pos)
+
+    matched = set()
+    # Each PT pin scans its DCB connector up to the matched pin, or to the end:
+    # {jd: [(last position scanned, matched, note), ...]}
+    scans = defaultdict(list)
+
     for jp in pt_descr.keys():
         for pt in pt_descr[jp]:
             # We always keep the original signal ID for Excel output
             pt['Original Signal ID'] = pt['Signal ID']
             if pt['DCB slot'] is not None:
                 jd = pt['DCB slot']
-                for dcb in dcb_descr[jd]:
-                    # Also add note entry for DCB to record depopulation info
-                    dcb['Note'] = None
-
-                    if pt['SEAM pin'] == dcb['SEAM pin'] and \
-                            dcb['Pigtail slot'] is not None and \
-                            dcb['Pigtail slot'] == jp and \
-                            pt['Pigtail pin'] == dcb['Pigtail pin']:
-                        pt['Signal ID'] = dcb['Signal ID']
-                        dcb['Note'] = pt['Note']
-                        break
+                key = (jd, pt['SEAM pin'], jp, pt['Pigtail pin'])
+                pos = dcb_index.get(key)
+
+                if pos is None:
+                    scans[jd].append((len(dcb_descr[jd])-1, False, None))
+                else:
+                    pt['Signal ID'] = dcb_descr[jd][pos]['Signal ID']
+                    scans[jd].append((pos, True, pt['Note']))
+                    matched.add(key)
+
+    # Also add note entry for DCB to record depopulation info: a scan resets
+    # the note of all DCB pins it goes through, then sets the note of the
+    # matched pin. Only the last scan going through a pin matters, so scans are
+    # replayed backwards, each pin being visited once.
+    for jd, jd_scans in scans.items():
+        dcbs = dcb_descr[jd]
+        done = -1
+        for pos, is_matched, note in reversed(jd_scans):
+            if pos <= done:
+                continue
+            for idx in range(done+1, pos+1):
+                dcbs[idx]['Note'] = None
+            if is_matched:
+                dcbs[pos]['Note'] = note
+            done = pos
+
+    # Report DCB pins that claim a Pigtail connection not found on PT side.
+    return [(key[0], dcb_descr[key[0]][pos])
+            for key, pos in dcb_index.items() if key not in matched]
 
 
 # Output #######################################################################
@@ -165,40 +237,15 @@ def aux_output_gen(aux_dict, title):
     return output
 
 
-#############################
-# Read signals and mappings #
-#############################
-
-# Read pin assignments from breakout board #
-BrkoutbrdReader = YamlReader(brkoutbrd_filename)
-brkoutbrd_descr = BrkoutbrdReader.read()
-
-brkoutbrd_data = map(transpose, brkoutbrd_descr.values())
-brkoutbrd_nested_signals = list(map(
-    lambda x: [s for s in x['Signal ID'] if s is not None and s != 'GND'],
-    brkoutbrd_data
-))
-
-# We intent to keep 'Signal ID' only, in a list.
-brkoutbrd_pin_assignments = [item for sublist in brkoutbrd_nested_signals
-                             for item in sublist]
-
-# Read info from Pigtail #
-PtReader = YamlReader(pt_filename)
-pt_descr = PtReader.read(flattener=lambda x: flatten(x, 'Pigtail pin'))
-
-# Read info from DCB #
-DcbReader = YamlReader(dcb_filename)
-dcb_descr = DcbReader.read(flattener=lambda x: flatten(x, 'SEAM pin'))
-
-# Make sure two ends of a single differential pair have the same note.
-check_diff_pairs_notes(pt_descr)
-
-
 ########################################
 # Define rules for Pigtail Altium list #
 ########################################
 
+# NOTE: Rules are dispatched by 'CompiledRulePD'. A rule that can only match
+#       when its Signal ID (or Note) contains one of a few keywords should
+#       declare them in 'signal_id_keywords' (or 'note_keywords'), so that it
+#       is skipped for all other entries.
+
 # This needs to be placed at the end of the rules list.  It always returns
 # 'True' to handle entries NOT matched by any other rules.
 class RulePT_Default(RulePD):
@@ -249,8 +296,10 @@ class RulePT_DCB(RulePD):
 
 
 class RulePT_PTLvSource(RulePD):
-    def __init__(self, brkoutbrd_rules):
-        self.rules = brkoutbrd_rules
+    signal_id_keywords = ['LV_SOURCE']
+
+    def __init__(self, brkoutbrd_index):
+        self.brkoutbrd = brkoutbrd_index
 
     def match(self, data, jp):
         if 'LV_SOURCE' in data['Signal ID']:
@@ -262,18 +311,18 @@ class RulePT_PTLvSource(RulePD):
         net_name = jp + '_' + data['Signal ID']
         attr = '_FRO_'
 
-        for rule in self.rules:
-            pt_name, tail = rule.split('_', 1)
-            if jp == pt_name and data['Signal ID'] in tail:
-                net_name = rule
-                attr = None
-                break
+        brkoutbrd_net_name = self.brkoutbrd.find_signal(jp, data['Signal ID'])
+        if brkoutbrd_net_name is not None:
+            net_name = brkoutbrd_net_name
+            attr = None
         return (
             NetNode(PT=jp, PT_PIN=data['Pigtail pin']),
             self.prop_gen(net_name, data['Note'], attr))
 
 
 class RulePT_PTLvReturn(RulePT_PTLvSource):
+    signal_id_keywords = ['LV_RETURN']
+
     def match(self, data, jp):
         if 'LV_RETURN' in data['Signal ID']:
             return True
@@ -282,6 +331,8 @@ class RulePT_PTLvReturn(RulePT_PTLvSource):
 
 
 class RulePT_PTLvSense(RulePT_PTLvSource):
+    signal_id_keywords = ['LV_SENSE']
+
     def match(self, data, jp):
         if 'LV_SENSE' in data['Signal ID']:
             return True
@@ -291,6 +342,8 @@ class RulePT_PTLvSense(RulePT_PTLvSource):
 
 # Put PTSingleToDiff rule above the general PT-DCB rule
 class RulePT_PTSingleToDiffP(RulePD):
+    signal_id_keywords = ['HYB_i2C', 'EC_RESET', 'EC_ADC']
+
     def match(self, data, jp):
         if not data['Signal ID'].endswith('_N') and \
                 ('HYB_i2C' in data['Signal ID'] or
@@ -316,6 +369,8 @@ class RulePT_PTSingleToDiffP(RulePD):
 
 
 class RulePT_PTSingleToDiffN(RulePD):
+    signal_id_keywords = ['HYB_i2C', 'EC_RESET', 'EC_ADC']
+
     def match(self, data, jp):
         if data['Signal ID'].endswith('_N') and \
                 ('HYB_i2C' in data['Signal ID'] or
@@ -339,6 +394,8 @@ class RulePT_PTSingleToDiffN(RulePD):
 
 
 class RulePT_UnusedToGND(RulePD):
+    note_keywords = ['Unused']
+
     def match(self, data, jp):
         if data['Note'] == 'Unused':
             return True
@@ -353,6 +410,8 @@ class RulePT_UnusedToGND(RulePD):
 
 # This needs to be placed above RulePT_NotConnected
 class RulePT_PTThermistorSpecial(RulePD):
+    note_keywords = ['Therm to JT']
+
     def match(self, data, jp):
         if data['Note'] is not None and 'Therm to JT' in data['Note']:
             return True
@@ -378,6 +437,8 @@ class RulePT_PTThermistorSpecial(RulePD):
 
 
 class RulePT_PTLvSenseGnd(RulePD):
+    signal_id_keywords = ['LV_SENSE_GND']
+
     def match(self, data, jp):
         if 'LV_SENSE_GND' in data['Signal ID']:
             return True
@@ -411,6 +472,8 @@ class RuleDCB_Default(RulePD):
 # This needs to be placed SECOND to the end of the rules list.  It only selects
 # entries that should become FRO AND are ELK input signals (for proper biasing)
 class RuleDCB_FRO_ELK(RulePD):
+    signal_id_keywords = ['ELK']
+
     def match(self, data, jd):
         if 'ELK' in data['Signal ID']:
             # Select GBTx data ELK or secondary-ctrl data-input ELK
@@ -432,6 +495,8 @@ class RuleDCB_FRO_ELK(RulePD):
 # This needs to be placed SECOND to the end of the rules list.  It only selects
 # entries that should become FRO AND are REMOTE_RESETB
 class RuleDCB_REMOTE_RESET(RulePD):
+    signal_id_keywords = ['REMOTE_RESETB']
+
     def match(self, data, jd):
         if 'REMOTE_RESETB' in data['Signal ID']:
             return True
@@ -476,6 +541,8 @@ class RuleDCB_PT(RulePD):
 
 # Put PTSingleToDiff rule above the general PT-DCB rule
 class RuleDCB_PTSingleToDiff(RulePD):
+    signal_id_keywords = ['HYB_i2C', 'EC_RESET', 'EC_ADC']
+
     def match(self, data, jd):
         if data['Pigtail slot'] is not None and \
                 ('HYB_i2C' in data['Signal ID'] or
@@ -501,8 +568,10 @@ class RuleDCB_PTSingleToDiff(RulePD):
 
 
 class RuleDCB_1V5(RulePD):
-    def __init__(self, brkoutbrd_rules):
-        self.rules = brkoutbrd_rules
+    signal_id_keywords = ['1.5V']
+
+    def __init__(self, brkoutbrd_index):
+        self.brkoutbrd = brkoutbrd_index
 
     def match(self, data, jd):
         if data['Signal ID'] == '1.5V':
@@ -517,16 +586,13 @@ class RuleDCB_1V5(RulePD):
             self.prop_gen(net_name))
 
     def netname_replacement(self, jd, signal):
-        net_name = jd + '_' + signal
-        for rule in self.rules:
-            dcb_name, tail = rule.split('_', 1)
-            if jd == dcb_name and '1V5' in tail and 'SENSE' not in tail:
-                net_name = rule
-                break
-        return net_name
+        net_name = self.brkoutbrd.find_1v5(jd)
+        return net_name if net_name is not None else jd + '_' + signal
 
 
 class RuleDCB_2V5(RuleDCB_1V5):
+    signal_id_keywords = ['2.5V']
+
     def match(self, data, jd):
         if data['Signal ID'] == '2.5V':
             return True
@@ -534,17 +600,13 @@ class RuleDCB_2V5(RuleDCB_1V5):
             return False
 
     def netname_replacement(self, jd, signal):
-        net_name = jd + '_' + signal
-        for rule in self.rules:
-            if '2V5' in rule and 'SENSE' not in rule:
-                dcb1, dcb2, _ = rule.split('_', 2)
-                if jd == dcb1 or jd[2:] == dcb2:
-                    net_name = rule
-                    break
-        return net_name
+        net_name = self.brkoutbrd.find_2v5(jd)
+        return net_name if net_name is not None else jd + '_' + signal
 
 
 class RuleDCB_1V5Sense(RuleDCB_1V5):
+    signal_id_keywords = ['1V5_SENSE']
+
     def match(self, data, jd):
         if '1V5_SENSE' in data['Signal ID']:
             return True
@@ -552,16 +614,13 @@ class RuleDCB_1V5Sense(RuleDCB_1V5):
             return False
 
     def netname_replacement(self, jd, signal):
-        net_name = jd + '_' + signal
-        for rule in self.rules:
-            dcb_name, tail = rule.split('_', 1)
-            if jd == dcb_name and signal[:-2] in tail:
-                net_name = rule
-                break
-        return net_name
+        net_name = self.brkoutbrd.find_signal(jd, signal[:-2])
+        return net_name if net_name is not None else jd + '_' + signal
 
 
 class RuleDCB_GND(RulePD):
+    signal_id_keywords = ['GND']
+
     def match(self, data, jd):
         if 'GND' == data['Signal ID']:
             return True
@@ -575,6 +634,8 @@ class RuleDCB_GND(RulePD):
 
 
 class RuleDCB_AGND(RuleDCB_GND):
+    signal_id_keywords = ['AGND']
+
     def match(self, data, jd):
         if 'AGND' == data['Signal ID']:
             return True
@@ -594,6 +655,8 @@ class RuleDCB_AGND(RuleDCB_GND):
 
 
 class RuleDCB_RefToSense(RulePD):
+    signal_id_keywords = ['EC_ADC_REF']
+
     def match(self, data, jd):
         if 'EC_ADC_REF' in data['Signal ID']:
             return True
@@ -626,225 +689,501 @@ class RuleDCB_RefToSense(RulePD):
             self.prop_gen(net_name))
 
 
-######################
-# Proto -> True-type #
-######################
-
-dcb_descr_true = {jd: dcb_descr[jd_swapping_true[jd]]
-                  for jd in dcb_descr.keys()}
+#######################################
+# Proto -> True-type and Mirror-type #
+#######################################
 
-pt_descr_true = deepcopy(pt_descr)
+# NOTE: Variants never modify the proto descriptions. They only store what
+#       differs from the proto: connectors are renamed, slot columns are
+#       remapped and any later modification is kept as a per-row override.
 
-for jp in pt_descr_true.keys():
-    for pt in pt_descr_true[jp]:
-        if pt['DCB slot'] is not None:
-            pt['DCB slot'] = jd_swapping_true[pt['DCB slot']]
+def extend_swapping(swapping, connectors):
+    # Connectors not covered by a swapping table, like the extra connectors of
+    # synthetic backplanes, keep their labels.
+    return {**{conn: conn for conn in connectors}, **swapping}
 
-# Deal with differential pairs.
-match_diff_pairs(pt_descr_true, dcb_descr_true, 'SCL_N')
-match_diff_pairs(pt_descr_true, dcb_descr_true, 'SDA_N')
-match_diff_pairs(pt_descr_true, dcb_descr_true, 'RESET_N')
-match_diff_pairs(pt_descr_true, dcb_descr_true, 'THERMISTOR_N')
-
-# Replace 'Signal ID' to DCB side definitions.
-match_dcb_side_signal_id(pt_descr_true, dcb_descr_true)
 
+def derive_true_type(pt_descr, dcb_descr):
+    jd_swapping = extend_swapping(jd_swapping_true, dcb_descr.keys())
 
-############################################
-# Define rules to be applied to True-type  #
-############################################
+    dcb_descr_true = LayeredDescr(
+        dcb_descr, {jd: jd_swapping[jd] for jd in dcb_descr.keys()})
 
-# Define an alias to indicate that here we are dealing with true-type.
-brkoutbrd_pin_assignments_true = brkoutbrd_pin_assignments
+    pt_descr_true = LayeredDescr(
+        pt_descr, remaps={'DCB slot': jd_swapping})
 
-pt_rules_true = [
-    RulePT_PTSingleToDiffP(),
-    RulePT_PTSingleToDiffN(),
-    RulePT_UnusedToGND(),
-    RulePT_PTLvSenseGnd(),
-    RulePT_PTThermistorSpecial(),
-    RulePT_DCB(),
-    RulePT_PTLvSource(brkoutbrd_pin_assignments_true),
-    RulePT_PTLvReturn(brkoutbrd_pin_assignments_true),
-    RulePT_PTLvSense(brkoutbrd_pin_assignments_true),
-    RulePT_Default()
-]
-
-dcb_rules_true = [
-    RuleDCB_GND(),
-    RuleDCB_AGND(),
-    RuleDCB_RefToSense(),
-    RuleDCB_PTSingleToDiff(),
-    RuleDCB_PT(),
-    RuleDCB_1V5(brkoutbrd_pin_assignments_true),
-    RuleDCB_2V5(brkoutbrd_pin_assignments_true),
-    RuleDCB_1V5Sense(brkoutbrd_pin_assignments_true),
-    RuleDCB_FRO_ELK(),
-    RuleDCB_REMOTE_RESET(),
-    RuleDCB_Default()
-]
-
-
-############################################
-# Generate True-type backplane Altium list #
-############################################
-
-# Debug
-# for rule in pt_rules_true:
-#     rule.debug_node = NetNode('JD1', 'C3', 'JP0', 'F8')
-
-PtSelectorTrue = SelectorPD(pt_descr_true, pt_rules_true)
-pt_result_true = PtSelectorTrue.do()
-
-DcbSelectorTrue = SelectorPD(dcb_descr_true, dcb_rules_true)
-dcb_result_true = DcbSelectorTrue.do()
-
-# See if we have any unused rule
-# for rule in pt_rules+dcb_rules:
-#     print('The rule {} has been used {} times'.format(
-#         rule.__class__.__name__, rule.counter))
-
-write_to_csv(pt_true_output_filename, pt_result_true, csv_line)
-write_to_csv(dcb_true_output_filename, dcb_result_true, csv_line)
-
-
-###############################################
-# Generate True-type backplane auxiliary list #
-###############################################
-
-pt_result_true_depop_aux = aux_dict_gen(pt_result_true)
-
-write_to_file(pt_result_true_depop_aux_output_filename,
-              aux_output_gen(pt_result_true_depop_aux,
-                             'Aux PT list for True-type'))
-
-
-########################
-# Proto -> Mirror-type #
-########################
-
-# NOTE: We don't want to modify the content of dcb_descr in-place.
-dcb_descr_copy = deepcopy(dcb_descr)
-jd_swapping_mirror_inverse = {v: k for k, v in jd_swapping_mirror.items()}
-dcb_descr_mirror = {jd: dcb_descr_copy[jd_swapping_mirror_inverse[jd]]
-                    for jd in dcb_descr_copy.keys()}
-
-for jd in dcb_descr_mirror.keys():
-    for dcb in dcb_descr_mirror[jd]:
-        if dcb['Pigtail slot'] is not None:
-            dcb['Pigtail slot'] = jp_swapping_mirror[dcb['Pigtail slot']]
-
-# NOTE: We don't want to modify the content of pt_descr in-place.
-pt_descr_copy = deepcopy(pt_descr)
-pt_descr_mirror = {jp: pt_descr_copy[jp_swapping_mirror[jp]]
-                   for jp in pt_descr_copy.keys()}
-
-for jp in pt_descr_mirror.keys():
-    for pt in pt_descr_mirror[jp]:
-        if pt['DCB slot'] is not None:
-            pt['DCB slot'] = jd_swapping_mirror[pt['DCB slot']]
-
-# Deal with differential pairs.
-match_diff_pairs(pt_descr_mirror, dcb_descr_mirror, 'SCL_N')
-match_diff_pairs(pt_descr_mirror, dcb_descr_mirror, 'SDA_N')
-match_diff_pairs(pt_descr_mirror, dcb_descr_mirror, 'RESET_N')
-match_diff_pairs(pt_descr_mirror, dcb_descr_mirror, 'THERMISTOR_N')
-
-# Replace 'Signal ID' to DCB side definitions.
-match_dcb_side_signal_id(pt_descr_mirror, dcb_descr_mirror)
-
-
-##############################################
-# Define rules to be applied to Mirror-type  #
-##############################################
-
-brkoutbrd_pin_assignments_mirror = []
-# Swap a few hybrid power signals due to #(active hybrids) diff on Mirror
-for signal in brkoutbrd_pin_assignments_true:
-    hyb = re.match(r'(^JP\d+)_(JPU\d|JPL\d|JT\d)_(P2_WEST|P4).*', signal)
-    if hyb is not None and (
-            (hyb.group(3) == 'P4' and hyb.group(1).endswith(
-                ('4', '7', '8', '11'))
-             ) or
-            (hyb.group(3) == 'P2_WEST' and hyb.group(1).endswith(
-                ('1', '2'))
-             )
-    ):
-        signal = re.sub(hyb.group(1), jp_swapping_mirror[hyb.group(1)], signal)
-        brkoutbrd_pin_assignments_mirror.append(signal)
+    return pt_descr_true, dcb_descr_true
 
-    else:
-        brkoutbrd_pin_assignments_mirror.append(signal)
 
-pt_rules_mirror = [
-    RulePT_PTSingleToDiffP(),
-    RulePT_PTSingleToDiffN(),
-    RulePT_UnusedToGND(),
-    RulePT_PTLvSenseGnd(),
-    RulePT_PTThermistorSpecial(),
-    RulePT_DCB(),
-    RulePT_PTLvSource(brkoutbrd_pin_assignments_mirror),
-    RulePT_PTLvReturn(brkoutbrd_pin_assignments_mirror),
-    RulePT_PTLvSense(brkoutbrd_pin_assignments_mirror),
-    RulePT_Default()
-]
+def derive_mirror_type(pt_descr, dcb_descr):
+    jd_swapping = extend_swapping(jd_swapping_mirror, dcb_descr.keys())
+    jp_swapping = extend_swapping(jp_swapping_mirror, pt_descr.keys())
 
-dcb_rules_mirror = [
-    RuleDCB_GND(),
-    RuleDCB_AGND(),
-    RuleDCB_RefToSense(),
-    RuleDCB_PTSingleToDiff(),
-    RuleDCB_PT(),
-    RuleDCB_1V5(brkoutbrd_pin_assignments_mirror),
-    RuleDCB_2V5(brkoutbrd_pin_assignments_mirror),
-    RuleDCB_1V5Sense(brkoutbrd_pin_assignments_mirror),
-    RuleDCB_FRO_ELK(),
-    RuleDCB_REMOTE_RESET(),
-    RuleDCB_Default()
-]
+    jd_swapping_mirror_inverse = {v: k for k, v in jd_swapping.items()}
+    dcb_descr_mirror = LayeredDescr(
+        dcb_descr,
+        {jd: jd_swapping_mirror_inverse[jd] for jd in dcb_descr.keys()},
+        {'Pigtail slot': jp_swapping})
 
+    pt_descr_mirror = LayeredDescr(
+        pt_descr,
+        {jp: jp_swapping[jp] for jp in pt_descr.keys()},
+        {'DCB slot': jd_swapping})
 
-##############################################
-# Generate Mirror-type backplane Altium list #
-##############################################
+    return pt_descr_mirror, dcb_descr_mirror
 
-# Debug
-# for rule in pt_rules_mirror:
-#     rule.debug_node = NetNode(None, None, 'JP2', 'A35')
 
-PtSelectorMirror = SelectorPD(pt_descr_mirror, pt_rules_mirror)
-pt_result_mirror = PtSelectorMirror.do()
+def brkoutbrd_index_mirror_gen(brkoutbrd_index):
+    # Swap a few hybrid power signals due to #(active hybrids) diff on Mirror
+    def is_swapped(net):
+        if not re.fullmatch(r'JP\d+', net.head) or \
+                not re.fullmatch(r'JPU\d|JPL\d|JT\d', net.connector):
+            return False
 
-DcbSelectorMirror = SelectorPD(dcb_descr_mirror, dcb_rules_mirror)
-dcb_result_mirror = DcbSelectorMirror.do()
+        return (net.signal.startswith('P4') and
+                net.head.endswith(('4', '7', '8', '11'))) or \
+            (net.signal.startswith('P2_WEST') and
+             net.head.endswith(('1', '2')))
+
+    return brkoutbrd_index.rename_heads(
+        is_swapped,
+        extend_swapping(jp_swapping_mirror,
+                        [net.head for net in brkoutbrd_index.nets]))
+
+
+variant_derivations = {
+    'true': (derive_true_type, lambda x: x),
+    'mirror': (derive_mirror_type, brkoutbrd_index_mirror_gen)
+}
+
+
+#############################################
+# Define rules to be applied to a backplane #
+#############################################
+
+def pt_rules_gen(brkoutbrd_index):
+    return [
+        RulePT_PTSingleToDiffP(),
+        RulePT_PTSingleToDiffN(),
+        RulePT_UnusedToGND(),
+        RulePT_PTLvSenseGnd(),
+        RulePT_PTThermistorSpecial(),
+        RulePT_DCB(),
+        RulePT_PTLvSource(brkoutbrd_index),
+        RulePT_PTLvReturn(brkoutbrd_index),
+        RulePT_PTLvSense(brkoutbrd_index),
+        RulePT_Default()
+    ]
+
+
+def dcb_rules_gen(brkoutbrd_index):
+    return [
+        RuleDCB_GND(),
+        RuleDCB_AGND(),
+        RuleDCB_RefToSense(),
+        RuleDCB_PTSingleToDiff(),
+        RuleDCB_PT(),
+        RuleDCB_1V5(brkoutbrd_index),
+        RuleDCB_2V5(brkoutbrd_index),
+        RuleDCB_1V5Sense(brkoutbrd_index),
+        RuleDCB_FRO_ELK(),
+        RuleDCB_REMOTE_RESET(),
+        RuleDCB_Default()
+    ]
 
-write_to_csv(pt_mirror_output_filename, pt_result_mirror, csv_line)
-write_to_csv(dcb_mirror_output_filename, dcb_result_mirror, csv_line)
 
+####################################
+# Lazily generate backplane result #
+####################################
 
-#################################################
-# Generate Mirror-type backplane auxiliary list #
-#################################################
+class BackplaneMapping(object):
+    '''
+    Generate Altium lists of true- and mirror-type backplanes on demand.
+
+    Nothing is read or computed until a result is requested, and each
+    intermediate result is computed at most once. Files are only written by
+    the 'write_*' methods.
+    '''
+    bp_types = ['true', 'mirror']
+
+    output_filenames = {
+        'true': {
+            'pt': pt_true_output_filename,
+            'dcb': dcb_true_output_filename,
+            'aux': pt_result_true_depop_aux_output_filename,
+            'pt_xlsx': pt_true_excel_file,
+            'dcb_xlsx': dcb_true_excel_file
+        },
+        'mirror': {
+            'pt': pt_mirror_output_filename,
+            'dcb': dcb_mirror_output_filename,
+            'aux': pt_result_mirror_depop_aux_output_filename,
+            'pt_xlsx': pt_mirror_excel_file,
+            'dcb_xlsx': dcb_mirror_excel_file
+        }
+    }
+
+    def __init__(self, use_cache=True, timed_rules=False):
+        self.use_cache = use_cache
+        # Measure the time spent in each rule, for 'rule_stats'.
+        self.timed_rules = timed_rules
+        self.computed = {}
+
+    def lazy(self, key, builder):
+        if key not in self.computed:
+            # Each intermediate result is a stage when instrumented.
+            name, info = (key, {}) if isinstance(key, str) else \
+                (key[0], {'bp_type': key[1]})
+            with profiler.stage(name, **info) as stage:
+                self.computed[key] = builder()
+                stage.count(self.computed[key])
+        return self.computed[key]
 
-pt_result_mirror_depop_aux = aux_dict_gen(pt_result_mirror)
+    @staticmethod
+    def title(bp_type):
+        return bp_type.capitalize() + '-type'
 
-write_to_file(pt_result_mirror_depop_aux_output_filename,
-              aux_output_gen(pt_result_mirror_depop_aux,
-                             'Aux PT list for Mirror-type'))
+    # Inputs ###################################################################
+    # The parsed YAML files are cached on disk. An entry is invalidated as soon
+    # as the content of the YAML file, of the module providing the flattener,
+    # or of the 'reader_sources', changes.
+
+    def brkoutbrd_pin_assignments(self, bp_type=None):
+        if bp_type is not None:
+            return self.brkoutbrd_index(bp_type).pin_assignments
+
+        return self.lazy('brkoutbrd_pin_assignments', lambda: cached(
+            'brkoutbrd_pin_assignments',
+            [brkoutbrd_filename, flattener_source(transpose)] + reader_sources,
+            'transpose:Signal ID',
+            lambda: read_brkoutbrd_pin_assignments(brkoutbrd_filename),
+            enabled=self.use_cache))
+
+    def brkoutbrd_index(self, bp_type):
+        _, gen = variant_derivations[bp_type]
+        return self.lazy(('brkoutbrd_index', bp_type), lambda: gen(
+            BrkoutbrdIndex(self.brkoutbrd_pin_assignments())))
+
+    def pt_descr(self, bp_type=None):
+        if bp_type is not None:
+            return self.descr(bp_type)[0]
+
+        return self.lazy('pt_descr', self.read_pt_descr)
+
+    def dcb_descr(self, bp_type=None):
+        if bp_type is not None:
+            return self.descr(bp_type)[1]
+
+        return self.lazy('dcb_descr', self.read_dcb_descr)
+
+    # Proto descriptions are shared by all variants, hence read-only once read.
+
+    def read_pt_descr(self):
+        pt_descr = cached(
+            'pt_descr',
+            [pt_filename, flattener_source(flatten)] + reader_sources,
+            'flatten:Pigtail pin',
+            lambda: read_flattened_descr(pt_filename, 'Pigtail pin'),
+            enabled=self.use_cache)
+
+        # Make sure two ends of a single differential pair have the same note.
+        check_diff_pairs_notes(pt_descr)
+
+        pt_descr.writable = False
+        return pt_descr
+
+    def read_dcb_descr(self):
+        dcb_descr = cached(
+            'dcb_descr',
+            [dcb_filename, flattener_source(flatten)] + reader_sources,
+            'flatten:SEAM pin',
+            lambda: read_flattened_descr(dcb_filename, 'SEAM pin'),
+            enabled=self.use_cache)
+
+        dcb_descr.writable = False
+        return dcb_descr
+
+    # Proto -> variants ########################################################
+
+    def descr(self, bp_type):
+        return self.lazy(('descr', bp_type), lambda: self.derive(bp_type))
+
+    def derive(self, bp_type):
+        derivation, _ = variant_derivations[bp_type]
+        pt_descr, dcb_descr = derivation(self.pt_descr(), self.dcb_descr())
+
+        # Deal with differential pairs.
+        match_diff_pairs(pt_descr, dcb_descr)
+
+        # Replace 'Signal ID' to DCB side definitions.
+        self.computed[('dcb_unmatched', bp_type)] = match_dcb_side_signal_id(
+            pt_descr, dcb_descr)
+
+        return pt_descr, dcb_descr
+
+    def dcb_unmatched(self, bp_type):
+        # DCB pins pointing to a PT pin that doesn't point back, recorded while
+        # deriving the variant, or returned by the worker that derived it.
+        key = ('dcb_unmatched', bp_type)
+        if key not in self.computed:
+            self.descr(bp_type)
+        return self.computed[key]
+
+    def dcb_unmatched_report(self, bp_type):
+        template = '{}: DCB connector {}, pin {} is not matched by {}, pin {}'
+        return [template.format(self.title(bp_type), jd, dcb['SEAM pin'],
+                                dcb['Pigtail slot'], dcb['Pigtail pin'])
+                for jd, dcb in self.dcb_unmatched(bp_type)]
+
+    # Results ##################################################################
+
+    def pt_rules(self, bp_type):
+        return self.lazy(('pt_rules', bp_type), lambda: CompiledRulePD(
+            profiler.instrument_rules(
+                pt_rules_gen(self.brkoutbrd_index(bp_type))),
+            self.timed_rules))
+
+    def dcb_rules(self, bp_type):
+        return self.lazy(('dcb_rules', bp_type), lambda: CompiledRulePD(
+            profiler.instrument_rules(
+                dcb_rules_gen(self.brkoutbrd_index(bp_type))),
+            self.timed_rules))
+
+    def pt_result(self, bp_type):
+        # Debug
+        # self.pt_rules(bp_type).debug_node = NetNode('JD1', 'C3', 'JP0', 'F8')
+        return self.lazy(('pt_result', bp_type), lambda: SelectorPD(
+            self.pt_descr(bp_type), [self.pt_rules(bp_type)]).do())
+
+    def dcb_result(self, bp_type):
+        return self.lazy(('dcb_result', bp_type), lambda: SelectorPD(
+            self.dcb_descr(bp_type), [self.dcb_rules(bp_type)]).do())
+
+    def rule_stats(self, bp_type):
+        # See if we have any unused rule, and where time is spent.
+        self.pt_result(bp_type)
+        self.dcb_result(bp_type)
+
+        title = self.title(bp_type)
+        return self.pt_rules(bp_type).report('PT rules for ' + title) + \
+            self.dcb_rules(bp_type).report('DCB rules for ' + title)
+
+    def aux(self, bp_type):
+        return self.lazy(('aux', bp_type),
+                         lambda: aux_dict_gen(self.pt_result(bp_type)))
+
+    # Output ###################################################################
+
+    def write_csv(self, bp_type):
+        filenames = self.output_filenames[bp_type]
+        pt_result = self.pt_result(bp_type)
+        dcb_result = self.dcb_result(bp_type)
+
+        with profiler.stage('write_csv', bp_type=bp_type) as stage:
+            write_to_csv(filenames['pt'], pt_result, csv_line)
+            write_to_csv(filenames['dcb'], dcb_result, csv_line)
+            stage.count((pt_result, dcb_result))
+
+    def write_aux(self, bp_type):
+        aux = self.aux(bp_type)
+
+        with profiler.stage('write_aux', bp_type=bp_type):
+            write_to_file(self.output_filenames[bp_type]['aux'],
+                          aux_output_gen(aux, 'Aux PT list for ' +
+                                         self.title(bp_type)))
+
+    def write_xlsx(self, bp_type):
+        with profiler.stage('write_xlsx', bp_type=bp_type) as stage:
+            self.write_xlsx_files(bp_type)
+            stage.count(self.descr(bp_type))
+
+    def write_xlsx_files(self, bp_type):
+        filenames = self.output_filenames[bp_type]
+
+        PtWriter = XLWriter(filenames['pt_xlsx'])
+        PtWriter.write(prepare_descr_for_xlsx_output(
+            self.pt_descr(bp_type).materialize()))
+
+        DcbWriter = XLWriter(filenames['dcb_xlsx'])
+        DcbWriter.write(prepare_descr_for_xlsx_output(
+            self.dcb_descr(bp_type).materialize()))
+
+    def write(self, bp_types=bp_types, xlsx=True):
+        for bp_type in bp_types:
+            self.write_csv(bp_type)
+            self.write_aux(bp_type)
+
+        if xlsx:
+            for bp_type in bp_types:
+                self.write_xlsx(bp_type)
+
+    def write_parallel(self, bp_types=bp_types, xlsx=True, rule_stats=False):
+        global shared_pipeline
+
+        # Read the inputs once, before forking, so that all workers share them.
+        self.pt_descr()
+        self.dcb_descr()
+        self.brkoutbrd_pin_assignments()
+
+        shared_pipeline = self
+        try:
+            with ProcessPoolExecutor(max_workers=len(bp_types),
+                                     mp_context=worker_context()) as executor:
+                futures = [executor.submit(write_variant, bp_type, xlsx,
+                                           self.use_cache, rule_stats)
+                           for bp_type in bp_types]
+
+                # Merge results and warnings in the order of 'bp_types', no
+                # matter which worker finishes first.
+                for bp_type, future in zip(bp_types, futures):
+                    pt_result, dcb_result, dcb_unmatched, warnings, profile = \
+                        future.result()
+                    self.computed[('pt_result', bp_type)] = pt_result
+                    self.computed[('dcb_result', bp_type)] = dcb_result
+                    self.computed[('dcb_unmatched', bp_type)] = dcb_unmatched
+                    profiler.merge(profile)
+                    print(warnings, end='')
+        finally:
+            shared_pipeline = None
+
+
+# Parallel generation ##########################################################
+
+# Set by 'BackplaneMapping.write_parallel' right before the workers are started.
+# With the 'fork' start method, workers inherit it, together with the inputs
+# already read by the parent, copy-on-write.
+shared_pipeline = None
+
+
+def worker_context():
+    if 'fork' in get_all_start_methods():
+        return get_context('fork')
+    return None
+
+
+def write_variant(bp_type, xlsx, use_cache, rule_stats=False):
+    mapping = shared_pipeline if shared_pipeline is not None \
+        else BackplaneMapping(use_cache, rule_stats)
+    profiler.worker_start()
+
+    # Warnings are collected and printed by the parent, so that they don't
+    # interleave between variants.
+    warnings = StringIO()
+    with redirect_stdout(warnings):
+        mapping.write_csv(bp_type)
+        mapping.write_aux(bp_type)
+        if xlsx:
+            mapping.write_xlsx(bp_type)
+        if rule_stats:
+            print('\n'.join(mapping.rule_stats(bp_type)))
+
+    # Everything the parent needs from the variant is returned, so that it
+    # doesn't derive the variant again. Unmatched DCB rows are returned as
+    # plain dicts, without the variant they belong to.
+    dcb_unmatched = [(jd, dcb.materialize())
+                     for jd, dcb in mapping.dcb_unmatched(bp_type)]
+
+    return (mapping.pt_result(bp_type), mapping.dcb_result(bp_type),
+            dcb_unmatched, warnings.getvalue(), profiler.worker_report())
+
+
+# Shared by all consumers of this module. Importing it is free: results are
+# only computed when they are first accessed.
+pipeline = BackplaneMapping()
+
+
+# Keep the old module-level names working, e.g.
+#   from AltiumNetlistGen import pt_result_true
+# now only computes the requested result, without writing any file.
+legacy_results = {
+    'pt_descr': lambda: pipeline.pt_descr(),
+    'dcb_descr': lambda: pipeline.dcb_descr(),
+    'brkoutbrd_pin_assignments': lambda: pipeline.brkoutbrd_pin_assignments(),
+    'pt_descr_true': lambda: pipeline.pt_descr('true'),
+    'dcb_descr_true': lambda: pipeline.dcb_descr('true'),
+    'pt_result_true': lambda: pipeline.pt_result('true'),
+    'dcb_result_true': lambda: pipeline.dcb_result('true'),
+    'pt_result_true_depop_aux': lambda: pipeline.aux('true'),
+    'pt_descr_mirror': lambda: pipeline.pt_descr('mirror'),
+    'dcb_descr_mirror': lambda: pipeline.dcb_descr('mirror'),
+    'pt_result_mirror': lambda: pipeline.pt_result('mirror'),
+    'dcb_result_mirror': lambda: pipeline.dcb_result('mirror'),
+    'pt_result_mirror_depop_aux': lambda: pipeline.aux('mirror'),
+}
+
+
+def __getattr__(name):
+    try:
+        return legacy_results[name]()
+    except KeyError:
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(__name__, name))
 
 
 #################################
-# Write mappings to Excel files #
+# Generate and write everything #
 #################################
 
-PtTrueWriter = XLWriter(pt_true_excel_file)
-PtTrueWriter.write(prepare_descr_for_xlsx_output(pt_descr_true))
+def parse_input(descr='Generate Altium netlists for the UT backplane.'):
+    parser = ArgumentParser(description=descr)
 
-DcbTrueWriter = XLWriter(dcb_true_excel_file)
-DcbTrueWriter.write(prepare_descr_for_xlsx_output(dcb_descr_true))
+    parser.add_argument('-t', '--type',
+                        dest='bp_types',
+                        action='append',
+                        choices=BackplaneMapping.bp_types,
+                        help='only generate the specified backplane type(s).')
+
+    parser.add_argument('--no-xlsx',
+                        dest='xlsx',
+                        action='store_false',
+                        help='do not write mappings to Excel files.')
+
+    parser.add_argument('-j', '--parallel',
+                        action='store_true',
+                        help='generate backplane types in parallel processes.')
+
+    parser.add_argument('--rule-stats',
+                        action='store_true',
+                        help='print how often each rule is tried and used.')
+
+    parser.add_argument('--unmatched-dcb',
+                        action='store_true',
+                        help='print DCB pins not matched by the PT pin they '
+                             'point to.')
+
+    parser.add_argument('--no-cache',
+                        dest='use_cache',
+                        action='store_false',
+                        help='always re-parse the input YAML files.')
+
+    parser.add_argument('--profile',
+                        metavar='REPORT',
+                        help='write per-stage and per-rule timings to this '
+                             'JSON file.')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_input()
+
+    if args.profile:
+        profiler.enable(args.profile)
+
+    pipeline.use_cache = args.use_cache
+    pipeline.timed_rules = args.rule_stats
+    bp_types = args.bp_types or BackplaneMapping.bp_types
+
+    if args.parallel:
+        pipeline.write_parallel(bp_types, args.xlsx, args.rule_stats)
+    else:
+        pipeline.write(bp_types, args.xlsx)
 
-PtMirrorWriter = XLWriter(pt_mirror_excel_file)
-PtMirrorWriter.write(prepare_descr_for_xlsx_output(pt_descr_mirror))
+        if args.rule_stats:
+            for bp_type in bp_types:
+                print('\n'.join(pipeline.rule_stats(bp_type)))
 
-DcbMirrorWriter = XLWriter(dcb_mirror_excel_file)
-DcbMirrorWriter.write(prepare_descr_for_xlsx_output(dcb_descr_mirror))
+    if args.unmatched_dcb:
+        for bp_type in bp_types:
+            for line in pipeline.dcb_unmatched_report(bp_type):
+                print(line)
@@ -1,13 +1,12 @@
 #!/usr/bin/env python
 #
 # License: MIT
-# Last Change: Fri Mar 01, 2019 at 05:18 PM -0500
+# Last Change: Sun Oct 18, 2026 at 09:48 AM +0000
 
 import re
 
 from pathlib import Path
 from collections import defaultdict
-from copy import deepcopy
 
 import sys
 sys.path.insert(0, './pyUTM')
@@ -15,47 +14,103 @@ sys.path.insert(0, './pyUTM')
 from pyUTM.common import flatten_more, unflatten_all
 from pyUTM.common import jp_flex_type_proto, all_pepis
 from pyUTM.common import jd_swapping_true, jd_swapping_mirror
-from pyUTM.io import write_to_csv
-from AltiumNetlistGen import pt_descr, dcb_descr
+from AltiumNetlistGen import pipeline
+from backplane.instrument import profiler
+from backplane.variant import VariantSet, VariantRecords
 
 output_dir = Path('output')
 mapping_output_filename = output_dir / Path('AsicToFiberMapping.csv')
 
+# (CSV header, field)
+output_columns = [
+    ('PEPI', 'pepi'),
+    ('Stave', 'stv_ut'),
+    ('Flex', 'stv_bp'),
+    ('Hybrid', 'hybrid'),
+    ('ASIC index', 'asic_idx'),
+    ('BP variant (alpha/beta/gamma)', 'bp_var'),
+    ('BP index (inner/middle/outer)', 'bp_idx'),
+    ('BP type (true/mirrored)', 'bp_type'),
+    ('DCB index', 'dcb_idx'),
+    ('GBTx index', 'gbtx_idx'),
+    ('GBTx channels (GBT frame bytes)', 'gbtx_chs'),
+    ('DC_OUT_RCLK', 'DC_OUT_RCLK'),
+    ('MC_TFC', 'MC_TFC'),
+    ('EC_HYB_I2C_SCL', 'EC_HYB_I2C_SCL'),
+    ('EC_HYB_I2C_SDA', 'EC_HYB_I2C_SDA'),
+    ('EC_RESET_GPIO', 'EC_RESET_GPIO'),
+    ('EC_ADC', 'EC_ADC'),
+]
+output_fields = [field for _, field in output_columns]
+
 
 ###########
 # Helpers #
 ###########
 
-# Filtering ####################################################################
+# Classification ###############################################################
 
-def filter_by_signal_id(keywords):
-    def filter_functor(entry):
-        return True if True in [bool(re.search(kw, entry['Signal ID']))
-                                for kw in keywords] else False
+signal_categories = [
+    ('elk', re.compile(r'ASIC')),
+    ('clk', re.compile(r'_CLK_')),
+    ('i2c', re.compile(r'_I2C_S')),
+    ('reset', re.compile(r'_RESET_')),
+    ('tfc', re.compile(r'_TFC_')),
+    ('thermistor', re.compile(r'_THERMISTOR_')),
+]
 
-    return filter_functor
+ctrl_categories = ['clk', 'i2c', 'reset', 'tfc', 'thermistor']
 
+positive_signal_id = re.compile(r'_P$')
 
-def find_matching_entries(flattened, ref, functor, continue_on_error=False):
-    result = []
 
-    for i in filter(functor, flattened):
-        try:
-            jd, jd_pin = (i['DCB slot'], i['SEAM pin'])
+def classify_entries(flattened, ref, categories=signal_categories,
+                     strict_categories=['elk']):
+    '''
+    Bucket all used Pigtail entries by signal category and polarity ('P' or
+    'N'), in a single pass, and add the Signal ID of the DCB pin each entry is
+    connected to as 'DCB signal ID'.
 
-            if i['Note'] != 'Unused':
-                i['DCB signal ID'] = ref[jd][jd_pin]['Signal ID']
-                result.append(i)
+    Return {category: {polarity: [(position, entry), ...]}}. Entries whose DCB
+    pin can't be found are skipped; for a strict category, this is reported
+    and no further entries are added to that category.
+    '''
+    buckets = {category: {'P': [], 'N': []} for category, _ in categories}
+    stopped = set()
 
+    for pos, entry in enumerate(flattened):
+        signal_id = entry['Signal ID']
+        matched = [category for category, regex in categories
+                   if category not in stopped and regex.search(signal_id)]
+        if not matched or entry['Note'] == 'Unused':
+            continue
+
+        jd, jd_pin = (entry['DCB slot'], entry['SEAM pin'])
+        try:
+            entry['DCB signal ID'] = ref[jd][jd_pin]['Signal ID']
         except Exception as e:
-            if not continue_on_error:
-                print('{} occured while processing DCB connector {}, pin {}'.format(
-                    e.__class__.__name__, jd, jd_pin))
-                print('The Pigtail side Signal ID is: {}'.format(
-                    i['Signal ID']))
-                break
+            for category in matched:
+                if category in strict_categories:
+                    print('{} occured while processing DCB connector {}, pin {}'.format(
+                        e.__class__.__name__, jd, jd_pin))
+                    print('The Pigtail side Signal ID is: {}'.format(
+                        signal_id))
+                    stopped.add(category)
+            continue
 
-    return result
+        polarity = 'P' if positive_signal_id.search(signal_id) else 'N'
+        for category in matched:
+            buckets[category][polarity].append((pos, entry))
+
+    return buckets
+
+
+def select_entries(buckets, categories, polarity='P'):
+    # Entries of any of the categories, in their original order.
+    selected = {}
+    for category in categories:
+        selected.update(buckets[category][polarity])
+    return [selected[pos] for pos in sorted(selected)]
 
 
 # Find ASIC/elink channels/etc. info ###########################################
@@ -112,38 +167,88 @@ def find_slot_idx(d, key='Pigtail slot'):
     return int(d[key][2:])
 
 
+# Backplane variants ###########################################################
+
+def not_alpha_only(d):
+    return d['Note'] is None or 'Alpha only' not in d['Note']
+
+
+# From the most to the least populated. Each variant is a predicate telling
+# whether a PT entry is populated in it.
+bp_variants = VariantSet([
+    ('alpha', lambda d: True),
+    ('beta', not_alpha_only),
+    ('gamma', lambda d: not_alpha_only(d) and find_slot_idx(d) < 8),
+])
+
+
 # Regularize output ############################################################
 
-def combine_asic_elk_channels(asic_descr):
-    for flex, flex_descr in asic_descr.items():
-        for asic, asic_chs in flex_descr.items():
-            # Error checking: Make sure ASIC elinks are connected to the same
-            # GBTx on the same DCB
-            hybrid = list(set(map(lambda x: x['hybrid'], asic_chs)))
-            asic_id = list(set(map(lambda x: x['asic_idx'], asic_chs)))
-            dcb_id = list(set(map(lambda x: x['dcb_idx'], asic_chs)))
-            gbtx_id = list(set(map(lambda x: x['gbtx_idx'], asic_chs)))
-            if len(gbtx_id) > 1 or len(dcb_id) > 1 or len(hybrid) > 1 or \
-                    len(asic_id) > 1:
-                raise ValueError(
-                    'More than one GBTx connected to {}-{}'.format(flex, asic))
-
-            # Now combine channels
-            gbtx_chs = map(lambda x: x['gbtx_ch'], asic_chs)
-            asic_descr[flex][asic] = {
-                'hybrid': hybrid[0],
-                'asic_idx': asic_id[0],
-                'dcb_idx': dcb_id[0],
-                'gbtx_idx': gbtx_id[0],
-                'gbtx_chs':
-                '-'.join(map(str, sorted(gbtx_chs, reverse=True)))
-            }
+def hybrid_keys(asic_bp_id):
+    # Hybrids of the control signals shared by an ASIC, e.g. 'P1' and 'P1_WEST'
+    # for 'P1_WEST_ASIC_2'.
+    hybrid_side = asic_bp_id.rsplit('_ASIC_', 1)[0]
+    return set([hybrid_side, hybrid_side.split('_', 1)[0]])
+
+
+def combine_channels(flex, asic, asic_chs):
+    # Error checking: Make sure ASIC elinks are connected to the same GBTx on
+    # the same DCB
+    hybrid = list(set(map(lambda x: x['hybrid'], asic_chs)))
+    asic_id = list(set(map(lambda x: x['asic_idx'], asic_chs)))
+    dcb_id = list(set(map(lambda x: x['dcb_idx'], asic_chs)))
+    gbtx_id = list(set(map(lambda x: x['gbtx_idx'], asic_chs)))
+    if len(gbtx_id) > 1 or len(dcb_id) > 1 or len(hybrid) > 1 or \
+            len(asic_id) > 1:
+        raise ValueError(
+            'More than one GBTx connected to {}-{}'.format(flex, asic))
+
+    # Now combine channels
+    gbtx_chs = map(lambda x: x['gbtx_ch'], asic_chs)
+    return {
+        'hybrid': hybrid[0],
+        'asic_idx': asic_id[0],
+        'dcb_idx': dcb_id[0],
+        'gbtx_idx': gbtx_id[0],
+        'gbtx_chs': '-'.join(map(str, sorted(gbtx_chs, reverse=True)))
+    }
+
+
+def combine_asic_elk_channels(asic_elks, variants):
+    '''
+    Combine the elink channels of each ASIC into a single record, for each
+    variant. 'asic_elks' maps (flex, ASIC) to [(variant mask, elink), ...].
+
+    Return the records, shared by variants populating the same elinks of an
+    ASIC, and an index of ASICs by (flex, hybrid), where hybrid is labeled as
+    in control signal IDs, so that control signals can be attached to their
+    ASICs without scanning all ASICs of a flex.
+    '''
+    records = VariantRecords(variants)
+    index = defaultdict(list)
+
+    for (flex, asic), elks in asic_elks.items():
+        for mask, asic_chs in variants.partition(elks):
+            records.add((flex, asic), mask,
+                        combine_channels(flex, asic, asic_chs))
+
+        for hybrid_key in hybrid_keys(asic):
+            index[(flex, hybrid_key)].append((flex, asic))
+
+    return records, index
 
 
 # Output #######################################################################
 
-def make_all_descr(descr, header=['alpha', 'beta', 'gamma']):
-    return dict(zip(header, descr))
+def make_all_descr(asic_records, variants):
+    all_descr = {}
+    for bp_var in variants.names:
+        descr = defaultdict(dict)
+        for (flex, asic), record in asic_records.select(bp_var).items():
+            descr[flex][asic] = record
+        all_descr[bp_var] = descr
+
+    return all_descr
 
 
 def find_dcb_idx_based_on_bp_type(idx, bp_type):
@@ -159,52 +264,96 @@ def find_dcb_idx_based_on_bp_type(idx, bp_type):
     return ref[jd_connector][2:]
 
 
-def generate_descr_for_all_pepi(all_descr):
-    flattened_all_pepis = flatten_more(all_pepis, header='pepi')
-    data = []
+def format_asic(asic_descr):
+    # Fields of an output row that only depend on the ASIC: hybrid, ASIC index,
+    # DCB index (before true/mirror swapping), and the trailing fields from
+    # 'GBTx index' on.
+    return (
+        asic_descr['hybrid'],
+        str(asic_descr['asic_idx']),
+        asic_descr['dcb_idx'],
+        (str(asic_descr['gbtx_idx']),
+         asic_descr['gbtx_chs'],
+         asic_descr['DC_OUT_RCLK'],
+         asic_descr['MC_TFC'],
+         asic_descr['EC_HYB_i2C_SCL'],
+         asic_descr['EC_HYB_i2C_SDA'],
+         asic_descr['EC_RESET_GPIO'],
+         asic_descr.get('EC_ADC'))
+    )
+
+
+def generate_rows_for_all_pepi(all_descr):
+    '''
+    Yield an output row, as a tuple ordered as 'output_columns', for each ASIC
+    of each flex of each PEPI.
+    '''
+    # The same flexes show up in many PEPIs; format their ASICs only once.
+    asic_rows = {}
+
+    for pepi in flatten_more(all_pepis, header='pepi'):
+        bp_variant = pepi['bp_var']
+        bp_type = pepi['bp_type']
 
-    for pepi in flattened_all_pepis:
         for flex_type_suffix in ['-M', '-S']:
-
-            bp_variant = pepi['bp_var']
             flex_type = pepi['stv_bp'] + flex_type_suffix
+            if flex_type not in all_descr[bp_variant].keys():
+                continue
 
-            if flex_type in all_descr[bp_variant].keys():
+            key = (bp_variant, flex_type)
+            if key not in asic_rows:
                 pointer = all_descr[bp_variant][flex_type]
-                for asic_type in sorted(pointer.keys()):
-                    asic_descr = pointer[asic_type]
-                    entry = deepcopy(pepi)
-                    entry['stv_bp'] = flex_type
-                    entry['hybrid'] = asic_descr['hybrid']
-                    entry['asic_idx'] = str(asic_descr['asic_idx'])
-
-                    # Handle the only true-mirror difference here.
-                    entry['dcb_idx'] = find_dcb_idx_based_on_bp_type(
-                        asic_descr['dcb_idx'], pepi['bp_type']
-                    )
-
-                    entry['gbtx_idx'] = str(asic_descr['gbtx_idx'])
-                    entry['gbtx_chs'] = asic_descr['gbtx_chs']
-                    entry['DC_OUT_RCLK'] = asic_descr['DC_OUT_RCLK']
-                    entry['MC_TFC'] = asic_descr['MC_TFC']
-                    entry['EC_HYB_I2C_SCL'] = asic_descr['EC_HYB_i2C_SCL']
-                    entry['EC_HYB_I2C_SDA'] = asic_descr['EC_HYB_i2C_SDA']
-                    entry['EC_RESET_GPIO'] = asic_descr['EC_RESET_GPIO']
-
-                    try:
-                        entry['EC_ADC'] = asic_descr['EC_ADC']
-                    except KeyError:
-                        entry['EC_ADC'] = None
-
-                    data.append(entry)
-
-    return data
+                asic_rows[key] = [format_asic(pointer[asic_type])
+                                  for asic_type in sorted(pointer.keys())]
+
+            for hybrid, asic_idx, dcb_idx, tail in asic_rows[key]:
+                yield (pepi['pepi'], pepi['stv_ut'], flex_type, hybrid,
+                       asic_idx, bp_variant, pepi['bp_idx'], bp_type,
+                       # Handle the only true-mirror difference here.
+                       find_dcb_idx_based_on_bp_type(dcb_idx, bp_type)) + \
+                    tail
+
+
+def tally_rows(rows, tally, samples=[0, 224, 3000]):
+    '''
+    Pass 'rows' through, counting them and those without thermistor in
+    'tally', and keeping the rows at 'samples' indices, as dicts, for unit
+    tests.
+    '''
+    adc_idx = output_fields.index('EC_ADC')
+
+    for idx, row in enumerate(rows):
+        tally['rows'] += 1
+        if row[adc_idx] is None:
+            tally['therm_none'] += 1
+        if idx in samples:
+            tally['samples'][idx] = dict(zip(output_fields, row))
+        yield row
+
+
+def write_rows_to_csv(filename, header, rows, eol='\n'):
+    # Same format as 'write_to_csv' with a dict formatter, but rows are tuples,
+    # written as they come.
+    with open(str(filename), 'w') as f:
+        f.write(','.join(header) + eol)
+        for row in rows:
+            f.write(','.join(map(str, row)) + eol)
 
 
 ##########################
 # Prepare for selections #
 ##########################
 
+profiler.section('prepare')
+
+# Only the proto descriptions are needed; no backplane variant is generated.
+# They are shared and read-only, and entries get new keys below, so work on
+# plain copies of their rows.
+pt_descr = {jp: [dict(row) for row in rows]
+            for jp, rows in pipeline.pt_descr().items()}
+dcb_descr = {jd: [dict(row) for row in rows]
+             for jd, rows in pipeline.dcb_descr().items()}
+
 # Convert DCB description to a dictionary: We do this so that DCB entries can be
 # access via entries['JDX']['PINXX'].
 dcb_ref_proto = unflatten_all(dcb_descr, 'SEAM pin')
@@ -212,18 +361,26 @@ dcb_ref_proto = unflatten_all(dcb_descr, 'SEAM pin')
 pt_descr_flattend = flatten_more(pt_descr, 'Pigtail slot')
 
 
+#######################
+# Classify PT entries #
+#######################
+
+profiler.section('classify')
+
+# All categories of signals are found in a single pass over the PT entries.
+pt_entries = classify_entries(pt_descr_flattend, dcb_ref_proto)
+
+
 ###########################
 # Find ASIC elink entries #
 ###########################
 
-filter_elk = filter_by_signal_id([r'ASIC'])
-elks_proto = find_matching_entries(pt_descr_flattend, dcb_ref_proto, filter_elk)
+profiler.section('find_elks')
 
 # Now since elinks are differential signals, we have two redundant descriptions:
 # one by all positive channels, one by negative channels. Here we pick positive
 # channels only (fix a gauge).
-filter_positive = filter_by_signal_id([r'_P$'])
-elks_proto_p = find_matching_entries(elks_proto, dcb_ref_proto, filter_positive)
+elks_proto_p = select_entries(pt_entries, ['elk'])
 
 
 ############################################################
@@ -233,10 +390,10 @@ elks_proto_p = find_matching_entries(elks_proto, dcb_ref_proto, filter_positive)
 #       because signal type moves with flex type (e.g. 'X-0-M'), not pigtail
 #       connector label.
 
-# Initialize elink mappings
-elks_descr_alpha = defaultdict(lambda: defaultdict(list))
-elks_descr_beta  = defaultdict(lambda: defaultdict(list))
-elks_descr_gamma = defaultdict(lambda: defaultdict(list))
+profiler.section('elk_mapping')
+
+# Elinks of each ASIC, stored once, each tagged with the variants populating it.
+asic_elks = defaultdict(list)
 
 for elk in elks_proto_p:
     # Find flex type, this is used for all backplanes.
@@ -248,60 +405,31 @@ for elk in elks_proto_p:
     # 8-ASIC is seperated into WEST/EAST for sorting.
     asic_bp_id = gen_asic_bp_id(hybrid, asic_idx, flex)
 
-    # Unconditionally append to alpha type backplane.
-    elks_descr_alpha[flex][asic_bp_id].append({
+    asic_elks[(flex, asic_bp_id)].append((bp_variants.mask(elk), {
         'hybrid': hybrid,
         'asic_idx': asic_idx,
         'asic_ch': asic_ch,
         'dcb_idx': find_slot_idx(elk, key='DCB slot'),
         'gbtx_idx': gbtx_idx,
         'gbtx_ch': gbtx_ch
-    })
-
-    # Now depopulate to beta type.
-    if elk['Note'] is None or 'Alpha only' not in elk['Note']:
-        elks_descr_beta[flex][asic_bp_id].append({
-            'hybrid': hybrid,
-            'asic_idx': asic_idx,
-            'asic_ch': asic_ch,
-            'dcb_idx': find_slot_idx(elk, key='DCB slot'),
-            'gbtx_idx': gbtx_idx,
-            'gbtx_ch': gbtx_ch
-        })
-
-        # Finally, depopulate further to gamma.
-        if find_slot_idx(elk) < 8:
-            elks_descr_gamma[flex][asic_bp_id].append({
-                'hybrid': hybrid,
-                'asic_idx': asic_idx,
-                'asic_ch': asic_ch,
-                'dcb_idx': find_slot_idx(elk, key='DCB slot'),
-                'gbtx_idx': gbtx_idx,
-                'gbtx_ch': gbtx_ch
-            })
+    }))
 
 
 # Combine GBTx channels for each ASIC on each flex, and check errors at the same
 # time.
-all_elk_descr = make_all_descr(
-    [elks_descr_alpha, elks_descr_beta, elks_descr_gamma])
-
-for _, i in all_elk_descr.items():
-    combine_asic_elk_channels(i)
+asic_records, asics_by_hybrid = combine_asic_elk_channels(asic_elks,
+                                                          bp_variants)
 
 
 #############################
 # Find ASIC control entries #
 #############################
 
-filter_ctrl = filter_by_signal_id([r'_CLK_', r'_I2C_S', r'_RESET_', r'_TFC_',
-                                   '_THERMISTOR_'])
-ctrl_proto = find_matching_entries(pt_descr_flattend, dcb_ref_proto,
-                                   filter_ctrl, continue_on_error=True)
+profiler.section('find_ctrls')
 
 # For control signals, we have to use the positive legs, because frequently,
 # negative legs are connected to the ground.
-ctrl_proto_p = find_matching_entries(ctrl_proto, dcb_ref_proto, filter_positive)
+ctrl_proto_p = select_entries(pt_entries, ctrl_categories)
 
 # Reformat some signal types
 for ctrl in ctrl_proto_p:
@@ -315,95 +443,81 @@ for ctrl in ctrl_proto_p:
 # Generate ASIC control fiber mapping for a single backplane #
 ##############################################################
 
+profiler.section('ctrl_mapping').count(ctrl_proto_p)
+
 for ctrl in ctrl_proto_p:
-    flex = find_proto_flex_type(ctrl)
-    hybrid = find_hybrid_info(ctrl)
-    # Alpha
-    for asic_bp_id in elks_descr_alpha[flex].keys():
-        if hybrid in asic_bp_id:
-            signal, channel = ctrl['DCB signal ID'].rsplit('_', 1)
-            elks_descr_alpha[flex][asic_bp_id][signal] = channel
-    # Beta
-    if ctrl['Note'] is None or 'Alpha only' not in ctrl['Note']:
-        for asic_bp_id in elks_descr_beta[flex].keys():
-            if hybrid in asic_bp_id:
-                signal, channel = ctrl['DCB signal ID'].rsplit('_', 1)
-                elks_descr_beta[flex][asic_bp_id][signal] = channel
-        # Gamma
-        if find_slot_idx(ctrl) < 8:
-            for asic_bp_id in elks_descr_gamma[flex].keys():
-                if hybrid in asic_bp_id:
-                    signal, channel = ctrl['DCB signal ID'].rsplit('_', 1)
-                    elks_descr_gamma[flex][asic_bp_id][signal] = channel
+    key = (find_proto_flex_type(ctrl), find_hybrid_info(ctrl))
+    signal, channel = ctrl['DCB signal ID'].rsplit('_', 1)
+
+    # Only the variants populating the control signal are updated.
+    mask = bp_variants.mask(ctrl)
+    for asic in asics_by_hybrid.get(key, []):
+        asic_records.update(asic, mask, {signal: channel})
 
 
 #################
 # Output to csv #
 #################
 
-elk_data = generate_descr_for_all_pepi(all_elk_descr)
+all_elk_descr = make_all_descr(asic_records, bp_variants)
+profiler.section('output').count(all_elk_descr)
+
+# Rows are streamed to a partial file, which replaces the output only if all
+# tests below pass.
+partial_output_filename = mapping_output_filename.with_suffix('.csv.part')
+tally = {'rows': 0, 'therm_none': 0, 'samples': {}}
 
-# Make sure total number of termistor 'None' channels makes sense
-total_therm_none = 0
-for i in elk_data:
-    if i['EC_ADC'] is None:
-        total_therm_none += 1
 try:
-    assert total_therm_none == 864
-except AssertionError:
-    print('Number of control links that do not go DCBs are: {}'.format(
-        total_therm_none
-    ))
-
-# Unitarity tests
-if len(elk_data) != 4192:
-    raise ValueError(
-        'Length of output data is {}, which is not 4192'.format(len(elk_data)))
-
-# Unit tests
-elif (elk_data[0]['dcb_idx'] != '2' or
-      elk_data[0]['DC_OUT_RCLK'] != '5' or
-      elk_data[0]['MC_TFC'] != '5' or
-      elk_data[0]['EC_HYB_I2C_SCL'] != '5' or
-      elk_data[0]['EC_HYB_I2C_SDA'] != '5' or
-      elk_data[0]['EC_RESET_GPIO'] != '5' or
-      elk_data[0]['EC_ADC'] is not None):
-    raise ValueError('Unit test failed: {}'.format(elk_data[0]))
-elif (elk_data[224]['dcb_idx'] != '1' or
-      elk_data[224]['DC_OUT_RCLK'] != '4' or
-      elk_data[224]['MC_TFC'] != '4' or
-      elk_data[224]['EC_HYB_I2C_SCL'] != '4' or
-      elk_data[224]['EC_HYB_I2C_SDA'] != '4' or
-      elk_data[224]['EC_RESET_GPIO'] != '4' or
-      elk_data[224]['EC_ADC'] != '6'):
-    raise ValueError('Unit test failed: {}'.format(elk_data[224]))
-elif (elk_data[3000]['dcb_idx'] != '11' or
-      elk_data[3000]['DC_OUT_RCLK'] != '0' or
-      elk_data[3000]['stv_bp'] != 'X-2-S' or
-      elk_data[3000]['stv_ut'] != 'UTbX_6A' or
-      elk_data[3000]['bp_var'] != 'beta' or
-      elk_data[3000]['bp_idx'] != 'middle' or
-      elk_data[3000]['bp_type'] != 'm'):
-    raise ValueError('Unit test failed: {}'.format(elk_data[3000]))
-
-
-# Write to csv
-else:
-    write_to_csv(mapping_output_filename, elk_data,
-                 {'PEPI': 'pepi',
-                  'Stave': 'stv_ut',
-                  'Flex': 'stv_bp',
-                  'Hybrid': 'hybrid',
-                  'ASIC index': 'asic_idx',
-                  'BP variant (alpha/beta/gamma)': 'bp_var',
-                  'BP index (inner/middle/outer)': 'bp_idx',
-                  'BP type (true/mirrored)': 'bp_type',
-                  'DCB index': 'dcb_idx',
-                  'GBTx index': 'gbtx_idx',
-                  'GBTx channels (GBT frame bytes)': 'gbtx_chs',
-                  'DC_OUT_RCLK': 'DC_OUT_RCLK',
-                  'MC_TFC': 'MC_TFC',
-                  'EC_HYB_I2C_SCL': 'EC_HYB_I2C_SCL',
-                  'EC_HYB_I2C_SDA': 'EC_HYB_I2C_SDA',
-                  'EC_RESET_GPIO': 'EC_RESET_GPIO',
-                  'EC_ADC': 'EC_ADC'})
+    write_rows_to_csv(
+        partial_output_filename, [header for header, _ in output_columns],
+        tally_rows(generate_rows_for_all_pepi(all_elk_descr), tally))
+    elk_data = tally['samples']
+
+    # Make sure total number of termistor 'None' channels makes sense
+    total_therm_none = tally['therm_none']
+    try:
+        assert total_therm_none == 864
+    except AssertionError:
+        print('Number of control links that do not go DCBs are: {}'.format(
+            total_therm_none
+        ))
+
+    # Unitarity tests
+    if tally['rows'] != 4192:
+        raise ValueError(
+            'Length of output data is {}, which is not 4192'.format(
+                tally['rows']))
+
+    # Unit tests
+    elif (elk_data[0]['dcb_idx'] != '2' or
+          elk_data[0]['DC_OUT_RCLK'] != '5' or
+          elk_data[0]['MC_TFC'] != '5' or
+          elk_data[0]['EC_HYB_I2C_SCL'] != '5' or
+          elk_data[0]['EC_HYB_I2C_SDA'] != '5' or
+          elk_data[0]['EC_RESET_GPIO'] != '5' or
+          elk_data[0]['EC_ADC'] is not None):
+        raise ValueError('Unit test failed: {}'.format(elk_data[0]))
+    elif (elk_data[224]['dcb_idx'] != '1' or
+          elk_data[224]['DC_OUT_RCLK'] != '4' or
+          elk_data[224]['MC_TFC'] != '4' or
+          elk_data[224]['EC_HYB_I2C_SCL'] != '4' or
+          elk_data[224]['EC_HYB_I2C_SDA'] != '4' or
+          elk_data[224]['EC_RESET_GPIO'] != '4' or
+          elk_data[224]['EC_ADC'] != '6'):
+        raise ValueError('Unit test failed: {}'.format(elk_data[224]))
+    elif (elk_data[3000]['dcb_idx'] != '11' or
+          elk_data[3000]['DC_OUT_RCLK'] != '0' or
+          elk_data[3000]['stv_bp'] != 'X-2-S' or
+          elk_data[3000]['stv_ut'] != 'UTbX_6A' or
+          elk_data[3000]['bp_var'] != 'beta' or
+          elk_data[3000]['bp_idx'] != 'middle' or
+          elk_data[3000]['bp_type'] != 'm'):
+        raise ValueError('Unit test failed: {}'.format(elk_data[3000]))
+
+    # Write to csv
+    partial_output_filename.replace(mapping_output_filename)
+
+finally:
+    # Whatever went wrong, don't leave the partial file behind.
+    if partial_output_filename.exists():
+        partial_output_filename.unlink()
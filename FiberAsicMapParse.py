@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 #
 # License: MIT
-# Last Change: Thu Dec 19, 2019 at 05:44 PM -0500
+# Last Change: Sun Oct 18, 2026 at 09:20 AM +0000
 
 import sys
 
@@ -9,6 +9,9 @@ from pathlib import Path
 from csv import DictReader
 from collections import defaultdict
 
+from backplane.cache import cached
+from backplane.instrument import profiler
+
 output_dir = Path('output')
 mapping_output_filename = output_dir / Path('AsicToFiberMapping.csv')
 
@@ -65,45 +68,58 @@ def read(file):
         return [dict(row) for row in reader]
 
 
-def filter_on_bp_type(l, pepi_type):
-    return [d for d in l if d['PEPI'] == pepi_type]
+def jd_init_dict():
+    return {str(gbtx): {'i2c': None, 'elinks': list()}
+            for gbtx in range(1, 7)}
 
 
-def filter_on_variant(l, variant_type):
-    return [d for d in l if d['BP variant (alpha/beta/gamma)'] == variant_type]
+def add_to_gbtx(result, data):
+    # Add the elinks of the ASIC in row 'data' to the GBTx it is connected to,
+    # in 'result[jd][gbtx]'.
+    jd = data['DCB index']
+    gbtx = str(int(data['GBTx index'])+1)
+    i2c = data['EC_HYB_I2C_SCL']
+    elinks = parse_elinks(data['GBTx channels (GBT frame bytes)'])
+    hybrid = data['Hybrid']
+    salt = int(data['ASIC index'])
 
+    gbtxs = result.setdefault(jd, jd_init_dict())
+    gbtxs[gbtx]['i2c'] = i2c
+    gbtxs[gbtx]['elinks'] += elinks
+    gbtxs[gbtx]['hybrid'] = hybrid
 
-def filter_on_jp(l, flex_type):
-    return [d for d in l if d['Flex'] == flex_type]
+    if gbtxs[gbtx]['hybrid'] in ['P1', 'P2']:
+        if salt > 3:
+            gbtxs[gbtx]['hybrid'] += 'E'
+        else:
+            gbtxs[gbtx]['hybrid'] += 'W'
 
 
-def jd_init_dict():
-    return {str(gbtx): {'i2c': None, 'elinks': list()}
-            for gbtx in range(1, 7)}
+def index_mapping(l):
+    '''
+    Aggregate all rows per GBTx, in a single pass:
+        {(PEPI, BP variant, flex): {DCB index: {GBTx: {...}}}}
+    '''
+    index = {}
+    for data in l:
+        key = (data['PEPI'], data['BP variant (alpha/beta/gamma)'],
+               data['Flex'])
+        add_to_gbtx(index.setdefault(key, {}), data)
 
+    return index
 
-def jds_per_jp(l, jp, jp_to_flex):
-    result = defaultdict(jd_init_dict)
-    flex_type = jp_to_flex[jp]
-
-    for data in filter_on_jp(l, flex_type):
-        jd = data['DCB index']
-        gbtx = str(int(data['GBTx index'])+1)
-        i2c = data['EC_HYB_I2C_SCL']
-        elinks = parse_elinks(data['GBTx channels (GBT frame bytes)'])
-        hybrid = data['Hybrid']
-        salt = int(data['ASIC index'])
-
-        result[jd][gbtx]['i2c'] = i2c
-        result[jd][gbtx]['elinks'] += elinks
-        result[jd][gbtx]['hybrid'] = hybrid
-
-        if result[jd][gbtx]['hybrid'] in ['P1', 'P2']:
-            if salt > 3:
-                result[jd][gbtx]['hybrid'] += 'E'
-            else:
-                result[jd][gbtx]['hybrid'] += 'W'
 
+def read_index(file, use_cache=True):
+    # The index is stored under 'cache/', and rebuilt as soon as the mapping,
+    # or this script, changes.
+    return cached('asic_fiber_mapping_index', [file, __file__],
+                  'index_mapping', lambda: index_mapping(read(file)),
+                  enabled=use_cache)
+
+
+def jds_per_jp(index, pepi, variant, jp, jp_to_flex):
+    result = defaultdict(jd_init_dict)
+    result.update(index.get((pepi, variant, jp_to_flex[jp]), {}))
     return result
 
 
@@ -131,9 +147,15 @@ if __name__ == '__main__':
     elif bp_type == 'mirror':
         jp_type_mapping = jp_type_translate(jp_mirror_type_aux)
 
-    raw = read(mapping_output_filename)
-    bp_filtered = filter_on_bp_type(raw, bp_type_mapping[bp_type])
-    var_filtered = filter_on_variant(bp_filtered, variant)
+    with profiler.stage('read') as stage:
+        index = read_index(mapping_output_filename)
+        stage.count(index)
+
+    with profiler.stage('jds_per_jp', bp_type=bp_type, variant=variant,
+                        jp=jp) as stage:
+        output = jds_per_jp(index, bp_type_mapping[bp_type], variant, jp,
+                            jp_type_mapping)
+        stage.count(output)
 
-    output = jds_per_jp(var_filtered, jp, jp_type_mapping)
-    output_to_markdown(jp, output)
+    with profiler.stage('output'):
+        output_to_markdown(jp, output)
@@ -1,50 +1,109 @@
 #!/usr/bin/env python
 #
 # License: MIT
-# Last Change: Thu Dec 12, 2019 at 03:28 AM -0500
+# Last Change: Sun Oct 18, 2026 at 09:46 AM +0000
 
 import re
+import os
+import traceback
 
 from datetime import datetime
 from pathlib import Path
 from os.path import basename
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
 
 import sys
 sys.path.insert(0, './pyUTM')
 
-from pyUTM.io import PcadNaiveReader, PcadReader
 from pyUTM.io import netnode_to_netlist
 from pyUTM.io import write_to_file
-from pyUTM.sim import CurrentFlow
 from pyUTM.selection import SelectorNet, RuleNetlist
-from AltiumNetlistGen import pt_result_true, dcb_result_true
-from AltiumNetlistGen import pt_result_true_depop_aux
-from AltiumNetlistGen import pt_result_mirror, dcb_result_mirror
-from AltiumNetlistGen import pt_result_mirror_depop_aux
+from AltiumNetlistGen import pipeline, worker_context
+from backplane.pcad import PcadStreamReader
+from backplane.cache import content_cached, file_digest, key_digest
+from backplane.sim import NetHopper
+from backplane.netlist import ComponentClassifier, Netlist
+import backplane.netlist
+import backplane.pcad
+import backplane.sim
+from backplane.netlist import RESISTOR, RB, RSP, CXRB, JP_GAMMA, JS
+from backplane.instrument import profiler
 
 log_dir = Path('log')
 
-# Use first argument as netlist filename.
-netlist = sys.argv[1]
-
 
 ###########
 # Helpers #
 ###########
 
-def find_backplane_type(filename):
+def parse_input(
+        descr='Check a backplane netlist against the generated reference.'):
+    parser = ArgumentParser(description=descr)
+
+    parser.add_argument('netlist',
+                        nargs='?',
+                        help='path to the PCAD netlist exported by Altium.')
+
+    parser.add_argument('log_filename',
+                        nargs='?',
+                        default=None,
+                        help='log filename. Default: a time-stamped file '
+                             'under log/.')
+
+    parser.add_argument('-b', '--batch',
+                        nargs='+',
+                        default=[],
+                        metavar='NETLIST',
+                        help='check all specified netlists, writing one log '
+                             'per netlist under log/ and printing a summary.')
+
+    parser.add_argument('-t', '--type',
+                        dest='bp_type',
+                        choices=pipeline.bp_types,
+                        help='backplane type of netlists whose filename '
+                             "doesn't contain it.")
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help='number of processes used to check nets (or '
+                             'netlists, in batch mode); 0 means one per CPU.')
+
+    parser.add_argument('--baseline',
+                        metavar='NETLIST',
+                        help='only re-check nets that differ from this '
+                             'previously checked netlist, and print the '
+                             'change in warnings.')
+
+    parser.add_argument('--profile',
+                        metavar='REPORT',
+                        help='write per-stage and per-rule timings to this '
+                             'JSON file.')
+
+    args = parser.parse_args()
+    if bool(args.netlist) == bool(args.batch):
+        parser.error('specify either a netlist or --batch')
+    if args.baseline and args.batch:
+        parser.error('--baseline can only be used with a single netlist')
+    return args
+
+
+def find_backplane_type(filename, default='unknown'):
     filename = filename.lower()
     if 'true' in filename:
         return 'true'
     elif 'mirror' in filename:
         return 'mirror'
     else:
-        return 'unknown'
+        return default
 
 
-def generate_log_filename(time_format="%Y-%m-%d_%H%M%S", file_extension='.log'):
+def generate_log_filename(netlist, label=None,
+                          time_format="%Y-%m-%d_%H%M%S",
+                          file_extension='.log'):
     header, _ = basename(__file__).split('.', 1)
-    type = find_backplane_type(netlist)
+    type = find_backplane_type(netlist) if label is None else label
     time = datetime.now().strftime(time_format)
     return log_dir / Path(header+'-'+type+'-'+time+file_extension)
 
@@ -58,32 +117,132 @@ def write_to_log(filename, data, **kwargs):
             output.append(entry)
         output.append('')
 
-    write_to_file(filename, output, **kwargs)
+    with profiler.stage('write_log', netlist=basename(str(filename))) as stage:
+        write_to_file(filename, output, **kwargs)
+        stage.count(data)
+
+
+# Parallel checking ############################################################
+
+def job_count(jobs):
+    return os.cpu_count() if jobs == 0 else jobs
+
+
+# Set by 'select_nets' right before the workers are started. With the 'fork'
+# start method, workers inherit it, together with the rules and netlists.
+shared_selection = None
+
+
+def select_shard(start, stop):
+    items, rules = shared_selection
+    return dict(SelectorNet(dict(items[start:stop]), rules).do())
+
+
+def select_nets(dataset, rules, jobs=1, shards_per_job=4):
+    '''
+    Same as 'SelectorNet(dataset, rules).do()', but with nets split into
+    contiguous shards that are checked by 'jobs' worker processes.
+
+    The entries of each section are merged in shard order, so the result is
+    identical to the serial one.
+    '''
+    global shared_selection
+
+    # Rules are only counted in this process, not in the workers.
+    rules = profiler.instrument_rules(rules)
+
+    jobs = job_count(jobs)
+    # Workers rely on inheriting the state of this script; without 'fork'
+    # they would have to re-run it.
+    if jobs <= 1 or worker_context() is None:
+        return SelectorNet(dataset, rules).do()
+
+    items = list(dataset.items())
+    shard_size = max(1, -(-len(items) // (jobs*shards_per_job)))
+    starts = range(0, len(items), shard_size)
+    stops = [start+shard_size for start in starts]
+
+    shared_selection = (items, rules)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 mp_context=worker_context()) as executor:
+            shard_results = list(executor.map(select_shard, starts, stops))
+    finally:
+        shared_selection = None
+
+    result = {}
+    for shard_result in shard_results:
+        for section, entries in shard_result.items():
+            result.setdefault(section, []).extend(entries)
+    return result
 
 
 #########################################################
 # Generate reference descriptions to be checked against #
 #########################################################
 
-# Combine Pigtail and DCB rules into a larger set of rules
-if find_backplane_type(netlist) == 'true':
-    backplane_result = {**pt_result_true, **dcb_result_true}
-    pt_result_depop_aux = pt_result_true_depop_aux
+# Only the backplane types being checked are generated, once per type; nothing
+# is written to 'output/'.
+references = {}
+
+
+def reference_gen(bp_type):
+    if bp_type not in pipeline.bp_types:
+        raise ValueError('Unknown backplane type: {}'.format(bp_type))
+
+    if bp_type not in references:
+        with profiler.stage('reference', bp_type=bp_type) as stage:
+            references[bp_type] = reference_build(bp_type)
+            stage.count(references[bp_type][0].keys())
 
-elif find_backplane_type(netlist) == 'mirror':
-    backplane_result = {**pt_result_mirror, **dcb_result_mirror}
-    pt_result_depop_aux = pt_result_mirror_depop_aux
+    return references[bp_type]
+
+
+def reference_build(bp_type):
+    # Combine Pigtail and DCB rules into a larger set of rules
+    backplane_result = {**pipeline.pt_result(bp_type),
+                        **pipeline.dcb_result(bp_type)}
+    pt_result_depop_aux = pipeline.aux(bp_type)
+
+    all_diff_nets = set()
+    for jp in pt_result_depop_aux.keys():
+        for node in pt_result_depop_aux[jp]['Depopulation: ELK']:
+            all_diff_nets.add(
+                pt_result_depop_aux[jp]['Depopulation: ELK'][node]['NETNAME']
+            )
 
-# Convert NetNode list to a parsed netlist
-backplane_netlist_result = netnode_to_netlist(backplane_result)
+    # Convert NetNode list to a parsed netlist
+    return netnode_to_netlist(backplane_result), all_diff_nets
 
 
 ####################################
 # Read info from backplane netlist #
 ####################################
 
-NetReader = PcadNaiveReader(netlist)
-netlist_dict = NetReader.read()
+# Component categories don't depend on the netlist, so the classifier is
+# shared by all netlists being checked.
+comp_classifier = ComponentClassifier()
+
+
+def read_netlist(netlist):
+    # Both the parsed and the hopped netlists are cached by the content of the
+    # netlist file, so that re-running the checks after a rule change skips
+    # parsing and hopping entirely. Entries are discarded as soon as the
+    # parser changes.
+    with profiler.stage('read_netlist', netlist=basename(str(netlist))) \
+            as stage:
+        NetReader = PcadStreamReader(netlist)
+        netlist_dict = content_cached(
+            'netlist', netlist,
+            ('PcadStreamReader', file_digest(backplane.pcad.__file__)),
+            NetReader.read)
+
+        # Classify every component once; rules only query the resulting
+        # bitmasks.
+        comp_classifier.classify_all(netlist_dict)
+        stage.count(netlist_dict.keys())
+
+    return netlist_dict
 
 
 ##############################
@@ -99,20 +258,15 @@ class RuleNetlist_P2B2Connector(RuleNetlist):
             '0. JS connector not present in Pigtail power net',
             'No JS connector found in {}'.format(netname)
         )
-        for c in components:
-            if c[0].startswith('JS'):
-                result = self.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
-                break
+        if comp_classifier.any(components, JS):
+            result = self.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
         return result
 
 
 class RuleNetlist_DepopDiffElksGamma(RuleNetlist):
     def match(self, netname, components):
         if netname in self.ref_netlist and \
-                self.OR([
-                    bool(re.search(r'^JP8|^JP9|^JP10|^JP11', x[0]))
-                    for x in components
-                ]):
+                comp_classifier.any(components, JP_GAMMA):
             return True
         else:
             return False
@@ -127,10 +281,7 @@ class RuleNetlist_DepopDiffElksGamma(RuleNetlist):
             return self.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
 
     def comp_match(self, components):
-        return not self.OR([
-            bool(re.search(r'^RB_\d+', x[0]))
-            for x in components
-        ])
+        return not comp_classifier.any(components, RB)
 
 
 class RuleNetlist_DepopDiffElksBeta(RuleNetlist_DepopDiffElksGamma):
@@ -141,10 +292,7 @@ class RuleNetlist_DepopDiffElksBeta(RuleNetlist_DepopDiffElksGamma):
             return False
 
     def comp_match(self, components):
-        return not self.OR([
-            bool(re.search(r'^RB_\d+|^CXRB_\d+', x[0]))
-            for x in components
-        ])
+        return not comp_classifier.any(components, RB | CXRB)
 
 
 class RuleNetlist_NeverUsedFROElks(RuleNetlist):
@@ -158,9 +306,7 @@ class RuleNetlist_NeverUsedFROElks(RuleNetlist):
             return False
 
     def process(self, netname, components):
-        if not self.OR([
-                bool(re.search(r'^R\d+', x[0])) for x in components
-        ]):
+        if not comp_classifier.any(components, RESISTOR):
             return (
                 '2. Never used elinks',
                 'No biasing resistor found in {}'.format(netname)
@@ -175,16 +321,13 @@ class RuleNetlist_RBSPMislabelledAsRB(RuleNetlist):
 
     def match(self, netname, components):
         if '_FRO_' not in netname and '_EC_' in netname and \
-                self.OR([
-                    bool(re.search(r'^JP8|^JP9|^JP10|^JP11', x[0]))
-                    for x in components
-                ]):
+                comp_classifier.any(components, JP_GAMMA):
             return True
         else:
             return False
 
     def process(self, netname, components):
-        resistor = self.search(r'^RB_\d+', components)
+        resistor = self.search(RB, components)
         if resistor is not None:
             return (
                 '0. Depopulation resistor labeling problem',
@@ -195,12 +338,9 @@ class RuleNetlist_RBSPMislabelledAsRB(RuleNetlist):
             return RuleNetlist.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
 
     @staticmethod
-    def search(reg, components):
-        result = [re.search(reg, x[0]) for x in components]
-        for r in result:
-            if r is not None:
-                return r.group()
-        return None
+    def search(category, components):
+        result = comp_classifier.matching(components, category)
+        return result[0] if result else None
 
 
 class RuleNetlist_RBMislabelledAsR(RuleNetlist_RBSPMislabelledAsRB):
@@ -211,7 +351,7 @@ class RuleNetlist_RBMislabelledAsR(RuleNetlist_RBSPMislabelledAsRB):
             return False
 
     def process(self, netname, components):
-        resistor = self.search(r'^R\d+', components)
+        resistor = self.search(RESISTOR, components)
         if resistor is not None:
             return (
                 '0. Depopulation resistor labeling problem',
@@ -230,7 +370,7 @@ class RuleNetlist_Default(RuleNetlist):
         return True
 
     def process(self, netname, components):
-        resistor = self.search_all(r'^RSP_\d+', components)
+        resistor = self.search_all(RSP, components)
         if resistor is not None:
             return (
                 '0. Depopulation resistor labeling problem',
@@ -241,13 +381,8 @@ class RuleNetlist_Default(RuleNetlist):
             return RuleNetlist.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
 
     @staticmethod
-    def search_all(reg, components):
-        result = [re.search(reg, x[0]) for x in components]
-        result_filtered = []
-
-        for r in result:
-            if r is not None:
-                result_filtered.append(r.group())
+    def search_all(category, components):
+        result_filtered = comp_classifier.matching(components, category)
 
         if result_filtered:
             return ', '.join(result_filtered)
@@ -259,36 +394,51 @@ class RuleNetlist_Default(RuleNetlist):
 # Do checks on the raw netlist #
 ################################
 
-all_diff_nets = []
-for jp in pt_result_depop_aux.keys():
-    for node in pt_result_depop_aux[jp]['Depopulation: ELK']:
-        all_diff_nets.append(
-            pt_result_depop_aux[jp]['Depopulation: ELK'][node]['NETNAME']
-        )
+def raw_net_rules_gen(all_diff_nets):
+    return [
+        RuleNetlist_P2B2Connector(),
+        RuleNetlist_DepopDiffElksGamma(all_diff_nets),
+        RuleNetlist_DepopDiffElksBeta(all_diff_nets),
+        RuleNetlist_RBSPMislabelledAsRB(),
+        RuleNetlist_RBMislabelledAsR(),
+        RuleNetlist_NeverUsedFROElks(),
+        RuleNetlist_Default()
+    ]
 
-raw_net_rules = [
-    RuleNetlist_P2B2Connector(),
-    RuleNetlist_DepopDiffElksGamma(all_diff_nets),
-    RuleNetlist_DepopDiffElksBeta(all_diff_nets),
-    RuleNetlist_RBSPMislabelledAsRB(),
-    RuleNetlist_RBMislabelledAsR(),
-    RuleNetlist_NeverUsedFROElks(),
-    RuleNetlist_Default()
-]
 
-RawNetChecker = SelectorNet(netlist_dict, raw_net_rules)
-result_check_raw_net = RawNetChecker.do()
+def check_raw_netlist(netlist_dict, all_diff_nets, jobs=1):
+    with profiler.stage('check_raw', jobs=jobs) as stage:
+        stage.count(netlist_dict.keys())
+        return select_nets(netlist_dict, raw_net_rules_gen(all_diff_nets),
+                           jobs)
 
 
 #####################################
 # Do net hopping on the raw netlist #
 #####################################
 
-NetHopper = CurrentFlow([r'^R\d+', r'^C\d+', r'^NT\d+', r'^CXRB_\d+',
-                         r'^RB_\d+|^RBSP\d+'])
-PcadReader.make_equivalent_nets_identical(
-    netlist_dict, NetHopper.do(netlist_dict)
-)
+hopping_regexes = [r'^R\d+', r'^C\d+', r'^NT\d+', r'^CXRB_\d+',
+                   r'^RB_\d+|^RBSP\d+']
+
+
+def hop_netlist(netlist_dict):
+    NetHopper(hopping_regexes).hop(netlist_dict)
+    return netlist_dict
+
+
+def read_hopped_netlist(netlist, netlist_dict):
+    # The raw netlist is no longer needed after this point, so it is hopped in
+    # place on a cache miss. Entries are discarded as soon as the parser or the
+    # hopper changes.
+    with profiler.stage('hop_netlist', netlist=basename(str(netlist))) \
+            as stage:
+        stage.count(netlist_dict.keys())
+        return content_cached(
+            'netlist_hopped', netlist,
+            ('PcadStreamReader', 'NetHopper', hopping_regexes,
+             [file_digest(src) for src in [backplane.pcad.__file__,
+                                           backplane.sim.__file__]]),
+            lambda: hop_netlist(netlist_dict))
 
 
 #################################
@@ -296,6 +446,10 @@ PcadReader.make_equivalent_nets_identical(
 #################################
 
 class RuleNetlistHopped_SingleToDiffN(RuleNetlist):
+    # Nets of the checked netlist this rule looks at, besides the one being
+    # checked.
+    ref_nets = ['GND']
+
     def match(self, netname, components):
         return bool(re.match(
             r'JD\d_JP\d_EC_(RESET_GPIO|HYB_i2C_SDA|HYB_i2C_SCL)_\d_N$',
@@ -304,9 +458,10 @@ class RuleNetlistHopped_SingleToDiffN(RuleNetlist):
 
     def process(self, netname, components):
         result = RuleNetlist.NETLISTCHECK_PROCESSED_NO_ERROR_FOUND
+        gnd = self.ref_netlist.nodes('GND')
 
         for c in components:
-            if c not in self.ref_netlist['GND']:
+            if c not in gnd:
                 result = (
                     '4. Not connected to GND',
                     'The following net is not connected to GND: {}'.format(
@@ -318,6 +473,10 @@ class RuleNetlistHopped_SingleToDiffN(RuleNetlist):
 
 
 class RuleNetlistHopped_NonExistComp(RuleNetlist):
+    def __init__(self, ref_netlist, netlist):
+        self.netlist = netlist
+        super().__init__(ref_netlist)
+
     def match(self, netname, components):
         if netname in self.ref_netlist.keys():
             return True
@@ -327,13 +486,15 @@ class RuleNetlistHopped_NonExistComp(RuleNetlist):
 
     def process(self, netname, components):
         missing_components = []
+        nodes = self.netlist.nodes(netname)
+        designators = self.netlist.designators(netname)
 
         for ref_comp in self.ref_netlist[netname]:
             if ref_comp[1] is None:  # Only the connector is specified,
-                if ref_comp[0] not in map(lambda x: x[0], components):
+                if ref_comp[0] not in designators:
                     missing_components.append(ref_comp[0])
 
-            elif ref_comp not in components:
+            elif ref_comp not in nodes:
                 missing_components.append('-'.join(ref_comp))
 
         if len(missing_components) > 0:
@@ -351,17 +512,29 @@ class RuleNetlistHopped_NonExistComp(RuleNetlist):
 # Do checks on the hopped netlist #
 ###################################
 
-hopped_net_rules = [
-    RuleNetlistHopped_SingleToDiffN(netlist_dict),
-    RuleNetlistHopped_NonExistComp(backplane_netlist_result)
-]
+def hopped_net_rules_gen(netlist_dict, backplane_netlist_result):
+    hopped_netlist = Netlist(netlist_dict)
 
-# Debug
-# for rule in hopped_net_rules:
-#     rule.debug_node = 'JD7_JP5_EC_HYB_i2C_SCL_2_N'
+    hopped_net_rules = [
+        RuleNetlistHopped_SingleToDiffN(hopped_netlist),
+        RuleNetlistHopped_NonExistComp(backplane_netlist_result,
+                                       hopped_netlist)
+    ]
 
-HoppedNetChecker = SelectorNet(netlist_dict, hopped_net_rules)
-result_check_hopped_net = HoppedNetChecker.do()
+    # Debug
+    # for rule in hopped_net_rules:
+    #     rule.debug_node = 'JD7_JP5_EC_HYB_i2C_SCL_2_N'
+
+    return hopped_net_rules
+
+
+def check_hopped_netlist(netlist_dict, backplane_netlist_result, jobs=1):
+    with profiler.stage('check_hopped', jobs=jobs) as stage:
+        stage.count(netlist_dict.keys())
+        return select_nets(
+            netlist_dict,
+            hopped_net_rules_gen(netlist_dict, backplane_netlist_result),
+            jobs)
 
 
 ################################
@@ -398,31 +571,324 @@ class RuleNetlistCopyPaste_NonExistNet(RuleNetlist):
 # Do checks on the copy-paste netlist #
 #######################################
 
-copy_paste_net_rules = [
-    RuleNetlistCopyPaste_NonExistNet(
-        netlist_dict,
-        [r'JD\d+_FRO_B[13]',
-         r'JD\d+_FRO_(MC|EC)_SEC_DOUT_ELK_[NP]',
-         r'JD\d+_FRO_DC_OUT_RCLK\d_[NP]',
-         r'JD\d+_FRO_MC_SEC_CLK_ELK_[NP]'
-         ])
-]
+def copy_paste_net_rules_gen(netlist_dict):
+    return [
+        RuleNetlistCopyPaste_NonExistNet(
+            netlist_dict,
+            [r'JD\d+_FRO_B[13]',
+             r'JD\d+_FRO_(MC|EC)_SEC_DOUT_ELK_[NP]',
+             r'JD\d+_FRO_DC_OUT_RCLK\d_[NP]',
+             r'JD\d+_FRO_MC_SEC_CLK_ELK_[NP]'
+             ])
+    ]
+
+
+def check_copy_paste_netlist(netlist_dict, backplane_netlist_result,
+                             jobs=1):
+    with profiler.stage('check_copy_paste', jobs=jobs) as stage:
+        stage.count(backplane_netlist_result.keys())
+        return select_nets(backplane_netlist_result,
+                           copy_paste_net_rules_gen(netlist_dict), jobs)
+
+
+############
+# Checking #
+############
+
+def check_netlist(netlist, bp_type, jobs=1):
+    backplane_netlist_result, all_diff_nets = reference_gen(bp_type)
+
+    netlist_dict = read_netlist(netlist)
+    result_check_raw_net = check_raw_netlist(netlist_dict, all_diff_nets,
+                                             jobs)
+
+    netlist_dict = read_hopped_netlist(netlist, netlist_dict)
+    result_check_hopped_net = check_hopped_netlist(
+        netlist_dict, backplane_netlist_result, jobs)
+    result_check_copy_paste_net = check_copy_paste_netlist(
+        netlist_dict, backplane_netlist_result, jobs)
+
+    return {**result_check_raw_net, **result_check_hopped_net,
+            **result_check_copy_paste_net}
+
+
+# Incremental checking #########################################################
+
+# The rules are defined in these files; stored check results are discarded as
+# soon as any of them changes.
+rule_sources = [__file__, backplane.netlist.__file__]
+
+
+def read_netlists(netlist):
+    netlist_dict = read_netlist(netlist)
+    # Hopping replaces component lists instead of modifying them, so a shallow
+    # copy is enough to keep the raw netlist intact.
+    return netlist_dict, read_hopped_netlist(netlist, dict(netlist_dict))
+
+
+def select_by_net(dataset, rules, netnames=None):
+    # Same as 'SelectorNet(dataset, rules).do()', but keep the warnings of
+    # each net apart: {netname: [(section, entry), ...]}.
+    netnames = dataset.keys() if netnames is None else netnames
+    result = {}
+    for netname in netnames:
+        selected = SelectorNet({netname: dataset[netname]}, rules).do()
+        result[netname] = [(section, entry)
+                           for section, entries in selected.items()
+                           for entry in entries]
+    return result
+
+
+def merge_by_net(dataset, result_by_net):
+    result = {}
+    for netname in dataset.keys():
+        for section, entry in result_by_net[netname]:
+            result.setdefault(section, []).append(entry)
+    return result
+
+
+def check_by_net(netlist_dict, hopped_dict, reference,
+                 netnames=(None, None, None)):
+    backplane_netlist_result, all_diff_nets = reference
+    raw_nets, hopped_nets, copy_paste_nets = netnames
+
+    return {
+        'raw': select_by_net(
+            netlist_dict, raw_net_rules_gen(all_diff_nets), raw_nets),
+        'hopped': select_by_net(
+            hopped_dict,
+            hopped_net_rules_gen(hopped_dict, backplane_netlist_result),
+            hopped_nets),
+        'copy_paste': select_by_net(
+            backplane_netlist_result, copy_paste_net_rules_gen(hopped_dict),
+            copy_paste_nets)
+    }
+
+
+def merge_checks_by_net(netlist_dict, hopped_dict, reference, result_by_net):
+    # Same sections as 'check_netlist'.
+    return {
+        **merge_by_net(netlist_dict, result_by_net['raw']),
+        **merge_by_net(hopped_dict, result_by_net['hopped']),
+        **merge_by_net(reference[0], result_by_net['copy_paste'])
+    }
+
+
+def changed_nets(baseline_dicts, dicts, reference):
+    '''
+    Return the nets that need to be re-checked, for the raw, hopped and
+    copy-paste checks respectively.
+    '''
+    baseline_raw, baseline_hopped = baseline_dicts
+    netlist_dict, hopped_dict = dicts
+
+    # Raw rules only look at the net itself; component order matters for
+    # the reported designators.
+    raw_nets = [netname for netname, components in netlist_dict.items()
+                if baseline_raw.get(netname) != components]
+
+    # After hopping, a net changes whenever any net of its hop-equivalence
+    # group changes.
+    baseline_view = Netlist(baseline_hopped)
+    view = Netlist(hopped_dict)
+
+    def hopped_changed(netname):
+        return netname not in baseline_hopped or \
+            view.nodes(netname) != baseline_view.nodes(netname)
+
+    hopped_nets = set(filter(hopped_changed, hopped_dict.keys()))
+
+    # Nets matched by rules looking at other nets (e.g. GND) also change
+    # when those nets do.
+    for rule in hopped_net_rules_gen(hopped_dict, reference[0]):
+        if any(netname in hopped_dict and hopped_changed(netname)
+               for netname in getattr(rule, 'ref_nets', [])):
+            hopped_nets.update(
+                netname for netname, components in hopped_dict.items()
+                if rule.match(netname, components))
+
+    # Copy-paste rules only depend on which nets exist.
+    copy_paste_nets = [netname for netname in reference[0].keys()
+                       if (netname in baseline_hopped) !=
+                       (netname in hopped_dict)]
+
+    return raw_nets, list(hopped_nets), copy_paste_nets
+
+
+def check_netlist_incremental(netlist, bp_type, baseline):
+    '''
+    Check 'netlist' by only re-checking the nets that differ from 'baseline'.
+
+    The per-net results of both netlists are stored in the cache, so the
+    baseline is only checked in full the first time. Return the results of
+    the baseline and of 'netlist', in the format of 'check_netlist'.
+    '''
+    reference = reference_gen(bp_type)
+    key = ('check_by_net', bp_type,
+           key_digest(reference[0], sorted(reference[1])),
+           [file_digest(src) for src in rule_sources])
+
+    baseline_dicts = read_netlists(baseline)
+    baseline_by_net = content_cached(
+        'check_results', baseline, key,
+        lambda: check_by_net(*baseline_dicts, reference))
+
+    dicts = read_netlists(netlist)
+    netnames = changed_nets(baseline_dicts, dicts, reference)
+    updated_by_net = check_by_net(*dicts, reference, netnames)
+
+    result_by_net = {
+        check: {**baseline_by_net[check], **updated_by_net[check]}
+        for check in updated_by_net.keys()
+    }
+    # Keep only the nets of 'netlist', so that it can serve as a baseline too.
+    for check, dataset in zip(['raw', 'hopped'], dicts):
+        result_by_net[check] = {netname: result_by_net[check][netname]
+                                for netname in dataset.keys()}
+    content_cached('check_results', netlist, key, lambda: result_by_net)
+
+    return (merge_checks_by_net(*baseline_dicts, reference, baseline_by_net),
+            merge_checks_by_net(*dicts, reference, result_by_net))
+
+
+def warning_delta(baseline_result, output_result):
+    output = []
+
+    for section in sorted(set(baseline_result) | set(output_result)):
+        baseline_entries = baseline_result.get(section, [])
+        entries = output_result.get(section, [])
+
+        baseline_set, entry_set = set(baseline_entries), set(entries)
+        added = [e for e in entries if e not in baseline_set]
+        removed = [e for e in baseline_entries if e not in entry_set]
+        if not added and not removed:
+            continue
+
+        output.append('========{}========'.format(section))
+        output += ['+ ' + e for e in added]
+        output += ['- ' + e for e in removed]
+        output.append('')
+
+    if not output:
+        output.append('No change in warnings.')
+
+    return output
+
+
+# Batch checking ###############################################################
+
+def check_file(netlist, bp_type, log_filename):
+    try:
+        output_result = check_netlist(netlist, bp_type)
+    except Exception as err:
+        # Carry on with the other netlists, but keep the traceback in the log
+        # of this one.
+        write_to_file(log_filename, [traceback.format_exc().rstrip('\n')])
+        return '{}: {}'.format(type(err).__name__, err)
+
+    write_to_log(log_filename, output_result)
+    return {section: len(entries)
+            for section, entries in output_result.items()}
+
+
+def check_batch(netlists, default_bp_type='unknown', jobs=1):
+    '''
+    Check all 'netlists', 'jobs' netlists at a time, writing one log per
+    netlist. Return a list of
+        (netlist, bp_type, log_filename, {section: number of warnings})
+    where the warning counts are replaced by an error message if the netlist
+    couldn't be checked; the traceback is then written to its log instead.
+    '''
+    tasks = []
+    for idx, netlist in enumerate(netlists, 1):
+        bp_type = find_backplane_type(netlist, default_bp_type)
+        # Netlists of different directories may share a filename: also label
+        # logs with the index of the netlist in the summary table.
+        log_filename = generate_log_filename(
+            netlist, '{}-{}'.format(Path(netlist).stem, idx))
+        tasks.append((netlist, bp_type, log_filename))
+
+    # Generate the references before forking, so that each backplane type is
+    # only generated once, no matter how many netlists are checked against it.
+    for bp_type in set(task[1] for task in tasks):
+        if bp_type in pipeline.bp_types:
+            reference_gen(bp_type)
+
+    jobs = job_count(jobs)
+    if jobs <= 1 or worker_context() is None:
+        results = [check_file(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 mp_context=worker_context()) as executor:
+            results = list(executor.map(check_file, *zip(*tasks)))
 
-CopyPasteNetChecker = SelectorNet(backplane_netlist_result,
-                                  copy_paste_net_rules)
-result_check_copy_paste_net = CopyPasteNetChecker.do()
+    return [task + (result,) for task, result in zip(tasks, results)]
 
 
-##########
-# Output #
-##########
+def summary_table(batch_result):
+    output = []
+    counts = [result for _, _, _, result in batch_result
+              if isinstance(result, dict)]
+    sections = sorted(set(section for c in counts for section in c.keys()))
+
+    for idx, (netlist, bp_type, log_filename, result) in enumerate(
+            batch_result, 1):
+        if isinstance(result, dict):
+            status = str(log_filename)
+        else:
+            status = 'FAILED: {} (see {})'.format(result, log_filename)
+        output.append('[{}] {} ({}): {}'.format(idx, netlist, bp_type, status))
+    output.append('')
+
+    rows = [['Category'] + ['[{}]'.format(idx)
+                            for idx in range(1, len(batch_result)+1)]]
+    for section in sections + ['Total']:
+        row = [section]
+        for _, _, _, result in batch_result:
+            if not isinstance(result, dict):
+                row.append('-')
+            elif section == 'Total':
+                row.append(str(sum(result.values())))
+            else:
+                row.append(str(result.get(section, 0)))
+        rows.append(row)
+
+    widths = [max(len(row[col]) for row in rows)
+              for col in range(len(rows[0]))]
+    for row in rows:
+        output.append('  '.join(
+            [row[0].ljust(widths[0])] +
+            [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        ))
+
+    return output
 
-output_result = {**result_check_raw_net, **result_check_hopped_net,
-                 **result_check_copy_paste_net}
 
-try:
-    log_filename = sys.argv[2]
-except IndexError:
-    log_filename = generate_log_filename()
+if __name__ == '__main__':
+    args = parse_input()
+
+    if args.profile:
+        profiler.enable(args.profile)
+    default_bp_type = args.bp_type or 'unknown'
+
+    if args.batch:
+        batch_result = check_batch(args.batch, default_bp_type, args.jobs)
+        print('\n'.join(summary_table(batch_result)))
+
+        sys.exit(int(any(not isinstance(result, dict)
+                         for _, _, _, result in batch_result)))
+
+    bp_type = find_backplane_type(args.netlist, default_bp_type)
+
+    if args.baseline:
+        baseline_result, output_result = check_netlist_incremental(
+            args.netlist, bp_type, args.baseline)
+        print('\n'.join(warning_delta(baseline_result, output_result)))
+    else:
+        output_result = check_netlist(args.netlist, bp_type, args.jobs)
+
+    log_filename = args.log_filename
+    if log_filename is None:
+        log_filename = generate_log_filename(args.netlist, bp_type)
 
-write_to_log(log_filename, output_result)
+    write_to_log(log_filename, output_result)
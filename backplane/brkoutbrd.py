@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:34 AM +0000
+
+from collections import defaultdict, namedtuple
+
+# A breakout board netname, e.g. 'JP0_JPL0_P4_LV_SOURCE' or 'JD3_2_JPL0_2V5',
+# split into its tokens:
+#   head:      'JP0', 'JD3': the backplane connector the net belongs to
+#   connector: 'JPL0', '2': the second token
+#   tail:      everything after the head
+#   signal:    everything after the connector, e.g. 'P4_LV_SOURCE'
+#   sense:     whether this is a sense line
+BrkoutbrdNet = namedtuple('BrkoutbrdNet', [
+    'netname', 'head', 'connector', 'tail', 'signal', 'sense'
+])
+
+
+def parse_brkoutbrd_net(netname):
+    head, _, tail = netname.partition('_')
+    connector, _, signal = tail.partition('_')
+
+    return BrkoutbrdNet(netname, head, connector, tail, signal,
+                        'SENSE' in tail)
+
+
+class BrkoutbrdIndex(object):
+    '''
+    Index of breakout board pin assignments, built once per backplane variant.
+
+    All lookups return the first matching netname in the order of the pin
+    assignments, or None.
+    '''
+    def __init__(self, pin_assignments):
+        self.pin_assignments = list(pin_assignments)
+        self.nets = [parse_brkoutbrd_net(n) for n in self.pin_assignments]
+
+        self.nets_by_head = defaultdict(list)
+        self.rail_1v5 = {}
+        self.rail_2v5_by_head = {}
+        self.rail_2v5_by_idx = {}
+
+        for pos, net in enumerate(self.nets):
+            self.nets_by_head[net.head].append(net)
+
+            if '1V5' in net.tail and not net.sense:
+                self.rail_1v5.setdefault(net.head, net.netname)
+
+            # A 2.5V rail is shared by two DCBs, e.g. 'JD3_2_...' powers both
+            # JD3 and JD2.
+            if '2V5' in net.netname and 'SENSE' not in net.netname:
+                self.rail_2v5_by_head.setdefault(net.head, pos)
+                self.rail_2v5_by_idx.setdefault(net.connector, pos)
+
+        # Lookups with a free-form signal are memoized on first use.
+        self.signal_memo = {}
+
+    def __iter__(self):
+        return iter(self.nets)
+
+    def find_signal(self, head, signal):
+        key = (head, signal)
+        try:
+            return self.signal_memo[key]
+        except KeyError:
+            pass
+
+        netname = None
+        for net in self.nets_by_head.get(head, []):
+            if signal in net.tail:
+                netname = net.netname
+                break
+
+        self.signal_memo[key] = netname
+        return netname
+
+    def find_1v5(self, jd):
+        return self.rail_1v5.get(jd)
+
+    def find_2v5(self, jd):
+        candidates = [pos for pos in (self.rail_2v5_by_head.get(jd),
+                                      self.rail_2v5_by_idx.get(jd[2:]))
+                      if pos is not None]
+        return self.nets[min(candidates)].netname if candidates else None
+
+    def rename_heads(self, predicate, head_mapping):
+        '''
+        Return a new index where the head of every net satisfying 'predicate'
+        is replaced according to 'head_mapping'.
+        '''
+        return BrkoutbrdIndex(
+            net.netname.replace(net.head, head_mapping[net.head])
+            if predicate(net) else net.netname
+            for net in self.nets
+        )
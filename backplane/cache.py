@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:40 AM +0000
+
+import os
+import pickle
+
+from pathlib import Path
+from hashlib import sha1
+
+# Bump this when the layout of cached objects changes.
+CACHE_VERSION = 2
+
+cache_dir = Path('cache')
+
+# Upper bound on the total size of content-addressed entries sharing a name,
+# see 'content_cached'.
+max_cache_size = 256 << 20
+
+
+###########
+# Helpers #
+###########
+
+def file_digest(filename, chunk_size=1 << 20):
+    digest = sha1()
+    with open(str(filename), 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(filename):
+    stat = os.stat(str(filename))
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def source_path(src):
+    # The same file may be reached through different paths, e.g. relative or
+    # through './pyUTM', depending on the script.
+    return str(Path(src).resolve())
+
+
+def source_digests(sources, known={}):
+    # Only re-hash a source when its mtime or size differ from what is
+    # recorded in the cache entry.
+    digests = {}
+    for src in map(source_path, sources):
+        stamp = file_stamp(src)
+        try:
+            known_stamp, known_digest = known[src]
+            if known_stamp == stamp:
+                digests[src] = (stamp, known_digest)
+                continue
+        except KeyError:
+            pass
+        digests[src] = (stamp, file_digest(src))
+    return digests
+
+
+def key_digest(*parts):
+    return sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def same_content(recorded, current):
+    return recorded.keys() == current.keys() and \
+        all(recorded[k][1] == current[k][1] for k in recorded.keys())
+
+
+#######
+# I/O #
+#######
+
+def load_entry(filename):
+    try:
+        with open(str(filename), 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, truncated or written by an incompatible version. In all
+        # cases the entry is simply rebuilt.
+        return None
+
+
+def dump_entry(filename, entry):
+    filename = Path(filename)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so that an interrupted run never leaves
+    # a half-written entry behind.
+    tmp_filename = filename.with_suffix('.tmp{}'.format(os.getpid()))
+    with open(str(tmp_filename), 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(str(tmp_filename), str(filename))
+
+
+def evict(directory, pattern, max_size):
+    # Remove the least recently used entries until the total size of the
+    # entries matching 'pattern' fits in 'max_size'.
+    entries = []
+    for filename in Path(directory).glob(pattern):
+        try:
+            stat = filename.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, filename))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, filename in sorted(entries, key=lambda x: x[0]):
+        if total_size <= max_size:
+            break
+        try:
+            filename.unlink()
+        except OSError:
+            pass
+        total_size -= size
+
+
+def cached(name, sources, key, builder, directory=None, enabled=True):
+    '''
+    Return the result of 'builder()', stored on disk under 'name'.
+
+    The stored result is reused as long as the content of all 'sources' and
+    'key' are unchanged. 'key' should identify how the result is derived from
+    the sources, e.g. the flattener used.
+    '''
+    if not enabled:
+        return builder()
+
+    directory = cache_dir if directory is None else Path(directory)
+    filename = directory / Path(name + '.pickle')
+    key = (CACHE_VERSION, key)
+
+    entry = load_entry(filename)
+    known = entry['sources'] if entry is not None else {}
+    digests = source_digests(sources, known)
+
+    if entry is not None and entry['key'] == key and \
+            same_content(entry['sources'], digests):
+        if entry['sources'] != digests:
+            # Content unchanged but files were touched: refresh the stamps so
+            # that the next lookup doesn't need to hash again.
+            entry['sources'] = digests
+            dump_entry(filename, entry)
+        return entry['data']
+
+    data = builder()
+    dump_entry(filename, {'key': key, 'sources': digests, 'data': data})
+    return data
+
+
+def content_cached(name, source, key, builder, directory=None, max_size=None,
+                   enabled=True):
+    '''
+    Return the result of 'builder()', stored on disk under the content hash of
+    'source' and 'key'.
+
+    Unlike 'cached', one entry is kept per distinct content, so that several
+    files (or several versions of one file) can be cached side by side. The
+    least recently used entries of 'name' are evicted once their total size
+    exceeds 'max_size' (default: 'max_cache_size').
+    '''
+    if not enabled:
+        return builder()
+
+    directory = cache_dir if directory is None else Path(directory)
+    max_size = max_cache_size if max_size is None else max_size
+    digest = key_digest(CACHE_VERSION, file_digest(source), key)
+    filename = directory / Path('{}-{}.pickle'.format(name, digest))
+
+    entry = load_entry(filename)
+    if entry is not None:
+        # Mark as recently used.
+        try:
+            os.utime(str(filename))
+        except OSError:
+            pass
+        return entry
+
+    data = builder()
+    dump_entry(filename, data)
+    evict(directory, name + '-*.pickle', max_size)
+    return data
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:48 AM +0000
+
+from array import array
+from copy import deepcopy
+from collections.abc import Mapping, MutableMapping, Sequence
+
+
+##############
+# Pin tables #
+##############
+
+class PinRow(MutableMapping):
+    '''
+    View of a single row of a 'PinTable', used like the dict it replaces.
+    Copies of a row are plain dicts.
+    '''
+    __slots__ = ('table', 'idx')
+
+    def __init__(self, table, idx):
+        self.table = table
+        self.idx = idx
+
+    def __getitem__(self, key):
+        code = self.table.codes[key][self.idx]
+        if not code:
+            raise KeyError(key)
+        return self.table.categories[key][code]
+
+    def __setitem__(self, key, value):
+        self.table.set(self.idx, key, value)
+
+    def __delitem__(self, key):
+        self[key]  # Raise a 'KeyError' for missing keys
+        self.table.set(self.idx, key, None, absent=True)
+
+    def __iter__(self):
+        codes, idx = self.table.codes, self.idx
+        return (col for col in self.table.columns if codes[col][idx])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def copy(self):
+        return {key: self[key] for key in self}
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+class PinRows(Sequence):
+    '''
+    Rows of a connector of a 'PinTable'. Row views hold no data, so they are
+    only created when accessed.
+    '''
+    __slots__ = ('table', 'span')
+
+    def __init__(self, table, span):
+        self.table = table
+        self.span = span
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [PinRow(self.table, idx) for idx in self.span[pos]]
+        return PinRow(self.table, self.span[pos])
+
+    def __iter__(self):
+        table = self.table
+        return (PinRow(table, idx) for idx in self.span)
+
+    def __len__(self):
+        return len(self.span)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class PinTable(Mapping):
+    '''
+    Columnar storage of a flattened pin description, {connector: [row, ...]}.
+
+    Each column is an array of integer codes into the distinct values of that
+    column, so that repeated values (slots, notes, signal IDs shared by many
+    pins) are only stored once. Rows of a connector are a contiguous range of
+    the arrays. The code 0 marks a row without that column.
+
+    Reading a connector returns its rows as 'PinRow' views, created on access.
+    Once 'writable' is
+    unset, e.g. after the table is shared by views, writes raise a 'TypeError'.
+    '''
+    def __init__(self, descr):
+        self.columns = []
+        self.codes = {}       # column -> array of codes
+        self.categories = {}  # column -> [placeholder, value, ...]
+        self.category_idx = {}  # column -> {value: code}
+        self.spans = {}       # connector -> range of row indices
+        self.writable = True
+
+        self.size = sum(len(rows) for rows in descr.values())
+        start = 0
+        for connector, rows in descr.items():
+            self.spans[connector] = range(start, start+len(rows))
+            for idx, row in enumerate(rows, start):
+                for key, value in row.items():
+                    self.set(idx, key, value)
+            start += len(rows)
+
+    def __getitem__(self, connector):
+        return PinRows(self, self.spans[connector])
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getstate__(self):
+        # Value indices are rebuilt on load.
+        state = dict(self.__dict__)
+        state.update(category_idx=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.category_idx = {
+            col: {value: code for code, value in enumerate(cats) if code}
+            for col, cats in self.categories.items()}
+
+    def set(self, idx, column, value, absent=False):
+        if not self.writable:
+            raise TypeError('Rows of a read-only pin table can not be modified')
+
+        if column not in self.codes:
+            self.columns.append(column)
+            self.codes[column] = array('I', [0]) * self.size
+            self.categories[column] = [None]
+            self.category_idx[column] = {}
+
+        if absent:
+            self.codes[column][idx] = 0
+            return
+
+        index = self.category_idx[column]
+        try:
+            code = index[value]
+        except KeyError:
+            code = len(self.categories[column])
+            self.categories[column].append(value)
+            index[value] = code
+        self.codes[column][idx] = code
+
+    def view(self, connectors=None, remaps=None):
+        '''
+        Return a read-only table sharing the rows of this one, with connectors
+        renamed according to 'connectors' ({new: source}) and the non-empty
+        values of some columns translated by 'remaps' ({column: mapping}).
+
+        Values are translated once per distinct value, not once per row. As the
+        view shares the codes of this table but not its values, this table
+        becomes read-only.
+        '''
+        self.writable = False
+
+        if connectors is None:
+            connectors = {c: c for c in self.spans.keys()}
+        remaps = {} if remaps is None else remaps
+
+        view = PinTable({})
+        view.columns = self.columns
+        view.codes = self.codes
+        view.size = self.size
+        view.spans = {new: self.spans[source]
+                      for new, source in connectors.items()}
+        view.writable = False
+
+        view.categories = dict(self.categories)
+        for column, mapping in remaps.items():
+            if column not in self.codes:
+                continue
+            codes = self.codes[column]
+            used = set()
+            for span in view.spans.values():
+                used.update(codes[span.start:span.stop])
+
+            categories = list(self.categories[column])
+            for code in used:
+                if code and categories[code] is not None:
+                    categories[code] = mapping[categories[code]]
+            view.categories[column] = categories
+
+        return view
+
+    def where(self, connector, column, predicate):
+        '''
+        Return the rows of 'connector' whose value in 'column' satisfies
+        'predicate', which is evaluated once per distinct value.
+        '''
+        categories = self.categories[column]
+        selected = set(code for code, value in enumerate(categories)
+                       if code and predicate(value))
+
+        codes = self.codes[column]
+        return [PinRow(self, idx) for idx in self.spans[connector]
+                if codes[idx] in selected]
+
+
+########################
+# Layered descriptions #
+########################
+
+
+class LayeredRow(MutableMapping):
+    '''
+    A pin description stored as overrides on top of a shared proto row.
+
+    Reading a key returns, in order of precedence: the value written to this
+    row, the value of the proto row translated by the column remapping of the
+    variant (if any), or the value of the proto row. The proto row is never
+    modified.
+
+    Written values are kept by the connector ('LayeredRows'), in 'written',
+    under the position 'pos' of the row, so that a row is only stored once it
+    is written to, and all views of the same row agree.
+    '''
+    __slots__ = ('proto', 'remaps', 'written', 'pos')
+
+    def __init__(self, proto, remaps, written=None, pos=0):
+        self.proto = proto
+        self.remaps = remaps
+        self.written = {} if written is None else written
+        self.pos = pos
+
+    def __getitem__(self, key):
+        overrides = self.written.get(self.pos)
+        if overrides is not None and key in overrides:
+            return overrides[key]
+
+        value = self.proto[key]
+        if value is not None and key in self.remaps:
+            return self.remaps[key][value]
+        return value
+
+    def __setitem__(self, key, value):
+        try:
+            self.written[self.pos][key] = value
+        except KeyError:
+            self.written[self.pos] = {key: value}
+
+    def __delitem__(self, key):
+        raise TypeError('Keys of a layered row can not be deleted')
+
+    def __iter__(self):
+        yield from self.proto
+        overrides = self.written.get(self.pos)
+        if overrides is not None:
+            for key in overrides:
+                if key not in self.proto:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def materialize(self):
+        return {key: self[key] for key in self}
+
+
+class LayeredRows(Sequence):
+    '''
+    Rows of a connector of a 'LayeredDescr'. Rows are created on access, on top
+    of the proto rows; only the values written to them are stored, by position.
+    '''
+    __slots__ = ('proto', 'remaps', 'written')
+
+    def __init__(self, proto, remaps):
+        self.proto = proto
+        self.remaps = remaps
+        self.written = {}  # position -> {key: value}
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[p] for p in range(len(self))[pos]]
+
+        row = self.proto[pos]
+        if pos < 0:
+            pos += len(self.proto)
+        return LayeredRow(row, self.remaps, self.written, pos)
+
+    def __iter__(self):
+        remaps, written = self.remaps, self.written
+        return (LayeredRow(row, remaps, written, pos)
+                for pos, row in enumerate(self.proto))
+
+    def __len__(self):
+        return len(self.proto)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class LayeredDescr(Mapping):
+    '''
+    A backplane variant derived from a proto description without copying it.
+
+    'connectors' maps each connector of the variant to the proto connector it
+    takes its pins from; 'remaps' maps a column name to a translation table
+    applied to all non-empty values of that column, e.g. to swap slots.
+    '''
+    def __init__(self, proto, connectors=None, remaps=None):
+        if isinstance(proto, PinTable):
+            # Rename and remap the whole table at once, so that rows don't
+            # translate values on every access.
+            proto, connectors, remaps = proto.view(connectors, remaps), None, {}
+
+        if connectors is None:
+            connectors = {c: c for c in proto.keys()}
+        remaps = {} if remaps is None else remaps
+
+        self.descr = {
+            connector: LayeredRows(proto[source], remaps)
+            for connector, source in connectors.items()
+        }
+
+    def __getitem__(self, connector):
+        return self.descr[connector]
+
+    def __iter__(self):
+        return iter(self.descr)
+
+    def __len__(self):
+        return len(self.descr)
+
+    def materialize(self):
+        return {connector: [row.materialize() for row in rows]
+                for connector, rows in self.descr.items()}
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:50 AM +0000
+
+import os
+import sys
+import json
+import atexit
+import tracemalloc
+
+from time import perf_counter
+from collections.abc import Mapping, Sequence
+from os.path import basename
+
+# Set this environment variable to the filename of the JSON report to enable
+# instrumentation, e.g.:
+#   BACKPLANE_PROFILE=profile.json ./AltiumNetlistGen.py
+ENV_VAR = 'BACKPLANE_PROFILE'
+
+
+###########
+# Helpers #
+###########
+
+def count_rows(data):
+    # Rows of a description ({connector: [row, ...]}, rows possibly created on
+    # access), or entries of any other result.
+    if isinstance(data, tuple):
+        counts = [count_rows(d) for d in data]
+        return None if None in counts else sum(counts)
+    if isinstance(data, Mapping) and \
+            all(isinstance(v, Sequence) and not isinstance(v, (str, tuple))
+                for v in data.values()):
+        return sum(len(v) for v in data.values())
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def peak_memory():
+    return tracemalloc.get_traced_memory()[1]
+
+
+def reset_peak_memory():
+    # Not available before Python 3.9, in which case peaks are measured from
+    # the start of instrumentation.
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+##########
+# Stages #
+##########
+
+class NullStage(object):
+    '''
+    Returned instead of a 'Stage' when instrumentation is off. Everything done
+    to it is discarded.
+    '''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def count(self, data):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+class Stage(object):
+    def __init__(self, profiler, name, info):
+        self.profiler = profiler
+        self.name = name
+        self.info = info
+        self.rows = None
+        self.wall = None
+        self.peak = 0
+        self.path = None
+
+    def count(self, data):
+        self.rows = count_rows(data)
+
+    def __enter__(self):
+        stack = self.profiler.stack
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak_memory())
+        self.path = '/'.join([s.name for s in stack] + [self.name])
+
+        stack.append(self)
+        reset_peak_memory()
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.wall = perf_counter() - self.start
+        self.peak = max(self.peak, peak_memory())
+
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        reset_peak_memory()
+
+        self.profiler.stages.append(self)
+        return False
+
+    def as_dict(self):
+        return dict(stage=self.path, start=self.start-self.profiler.start,
+                    wall=self.wall, peak_memory=self.peak, rows=self.rows,
+                    **self.info)
+
+
+#########
+# Rules #
+#########
+
+class RuleStats(object):
+    def __init__(self):
+        self.match_calls = 0
+        self.matched = 0
+        self.match_time = 0.
+        self.process_calls = 0
+        self.process_time = 0.
+
+    def timed_match(self, match):
+        def wrapper(*args):
+            start = perf_counter()
+            result = match(*args)
+            self.match_time += perf_counter() - start
+            self.match_calls += 1
+            if result:
+                self.matched += 1
+            return result
+        return wrapper
+
+    def timed_process(self, process):
+        def wrapper(*args):
+            start = perf_counter()
+            result = process(*args)
+            self.process_time += perf_counter() - start
+            self.process_calls += 1
+            return result
+        return wrapper
+
+
+############
+# Profiler #
+############
+
+class Profiler(object):
+    '''
+    Record wall time, peak memory and rows processed per pipeline stage, and
+    calls and time per rule, then write them to a JSON report at exit.
+
+    When disabled (the default), 'stage' returns a shared no-op object and
+    rules are left untouched.
+    '''
+    def __init__(self):
+        self.enabled = False
+        self.filename = None
+        self.stages = []
+        self.stack = []
+        self.rules = {}
+        self.worker_stages = []  # Already reported by worker processes
+
+    def enable(self, filename):
+        if self.enabled:
+            return
+
+        self.enabled = True
+        self.filename = os.path.abspath(filename)
+        self.start = perf_counter()
+        tracemalloc.start()
+        atexit.register(self.write)
+
+    def stage(self, name, **info):
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, info)
+
+    def section(self, name, **info):
+        '''
+        End the current section, if any, and start a new one. Meant for
+        module-level scripts, where the next section ends the previous one.
+        '''
+        if not self.enabled:
+            return NULL_STAGE
+
+        while self.stack:
+            self.stack[-1].__exit__(None, None, None)
+        return self.stage(name, **info).__enter__()
+
+    def instrument_rules(self, rules):
+        '''
+        Count and time 'match' and 'process' calls of each rule, by class.
+        Rules dispatching to other rules (like 'CompiledRulePD') are
+        instrumented through the rules they hold.
+        '''
+        if not self.enabled:
+            return rules
+
+        for rule in rules:
+            inner_rules = getattr(rule, 'rules', None)
+            if inner_rules is not None:
+                self.instrument_rules(inner_rules)
+                continue
+
+            # Already instrumented.
+            if 'match' in vars(rule):
+                continue
+
+            stats = self.rules.setdefault(type(rule).__name__, RuleStats())
+            rule.match = stats.timed_match(rule.match)
+            rule.process = stats.timed_process(rule.process)
+
+        return rules
+
+    def worker_start(self):
+        '''
+        Forget what a forked worker process inherited from its parent, so that
+        'worker_report' only holds what the worker did since.
+        '''
+        self.stages = []
+        self.rules = {}
+
+    def worker_report(self):
+        '''
+        Stages and rule counts of a worker process, to be returned to the
+        parent and passed to its 'merge'.
+        '''
+        if not self.enabled:
+            return None
+
+        return {
+            'stages': [s.as_dict() for s in self.stages],
+            'rules': {name: vars(stats) for name, stats in self.rules.items()}
+        }
+
+    def merge(self, report):
+        if not self.enabled or report is None:
+            return
+
+        self.worker_stages += report['stages']
+        for name, counts in report['rules'].items():
+            stats = self.rules.setdefault(name, RuleStats())
+            for attr, value in counts.items():
+                setattr(stats, attr, getattr(stats, attr) + value)
+
+    def report(self):
+        # Workers share the clock, and the start, of their parent.
+        stages = [s.as_dict() for s in self.stages] + self.worker_stages
+        return {
+            'script': basename(sys.argv[0]),
+            'argv': sys.argv[1:],
+            'wall': perf_counter() - self.start,
+            'peak_memory': max([peak_memory()] +
+                               [s['peak_memory'] for s in stages]),
+            'stages': sorted(stages, key=lambda x: x['start']),
+            'rules': {name: vars(stats) for name, stats in self.rules.items()}
+        }
+
+    def write(self):
+        # Close sections left open by module-level scripts.
+        while self.stack:
+            self.stack[-1].__exit__(None, None, None)
+
+        with open(self.filename, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+profiler = Profiler()
+
+if os.environ.get(ENV_VAR):
+    profiler.enable(os.environ[ENV_VAR])
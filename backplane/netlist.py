@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 08:57 AM +0000
+
+import re
+
+from collections.abc import Mapping
+
+# Component categories, as bit flags.
+RESISTOR = 1 << 0   # R1, R2, ...
+CAPACITOR = 1 << 1  # C1, ...
+NET_TIE = 1 << 2    # NT1, ...
+RB = 1 << 3         # RB_1, ...: depopulation biasing resistors
+RBSP = 1 << 4       # RBSP1, ...
+RSP = 1 << 5        # RSP_1, ...
+CXRB = 1 << 6       # CXRB_1, ...
+JP_GAMMA = 1 << 7   # JP8-JP11: Pigtail connectors with gamma-type hybrids
+JS = 1 << 8         # JS connectors
+
+component_categories = [
+    (RESISTOR, r'^R\d+'),
+    (CAPACITOR, r'^C\d+'),
+    (NET_TIE, r'^NT\d+'),
+    (RB, r'^RB_\d+'),
+    (RBSP, r'^RBSP\d+'),
+    (RSP, r'^RSP_\d+'),
+    (CXRB, r'^CXRB_\d+'),
+    (JP_GAMMA, r'^JP8|^JP9|^JP10|^JP11'),
+    (JS, r'^JS'),
+]
+
+
+class ComponentClassifier(object):
+    '''
+    Tag component designators with a bitmask of the categories they belong
+    to, so that rules can test categories without running regexes.
+
+    Each designator is only classified once.
+    '''
+    def __init__(self, categories=component_categories):
+        self.categories = [(flag, re.compile(regex))
+                           for flag, regex in categories]
+        self.regexes = {flag: regex for flag, regex in self.categories}
+        self.masks = {}
+
+    def classify(self, comp):
+        mask = 0
+        for flag, regex in self.categories:
+            if regex.search(comp):
+                mask |= flag
+        self.masks[comp] = mask
+        return mask
+
+    def classify_all(self, netlist):
+        for components in netlist.values():
+            for comp, _ in components:
+                if comp not in self.masks:
+                    self.classify(comp)
+        return self
+
+    def mask(self, comp):
+        try:
+            return self.masks[comp]
+        except KeyError:
+            return self.classify(comp)
+
+    def any(self, components, flags):
+        masks = self.masks
+        for comp, _ in components:
+            mask = masks.get(comp)
+            if mask is None:
+                mask = self.classify(comp)
+            if mask & flags:
+                return True
+        return False
+
+    def matching(self, components, flag):
+        # Return the part of each component designator matched by the regex
+        # of category 'flag', as 're.search(regex, comp).group()' would.
+        regex = self.regexes[flag]
+        return [regex.search(comp).group() for comp, _ in components
+                if self.mask(comp) & flag]
+
+
+class Netlist(Mapping):
+    '''
+    Read-only view of a {netname: [(comp, pin), ...]} netlist with set-based
+    membership tests and a component-to-nets inverted index.
+
+    Nets sharing the same component list, as they do after hopping, also
+    share their sets, so that a group of equivalent nets is indexed once.
+    '''
+    def __init__(self, netlist):
+        self.netlist = netlist
+        # id(component list) -> (component list, node set, designator set)
+        self.sets = {}
+        self.comp_index = None
+
+    def __getitem__(self, netname):
+        return self.netlist[netname]
+
+    def __iter__(self):
+        return iter(self.netlist)
+
+    def __len__(self):
+        return len(self.netlist)
+
+    def component_sets(self, netname):
+        components = self.netlist[netname]
+        try:
+            return self.sets[id(components)]
+        except KeyError:
+            # Keep a reference to the list, so that its id stays unique.
+            entry = (components, frozenset(components),
+                     frozenset(comp for comp, _ in components))
+            self.sets[id(components)] = entry
+            return entry
+
+    def nodes(self, netname):
+        return self.component_sets(netname)[1]
+
+    def designators(self, netname):
+        return self.component_sets(netname)[2]
+
+    def nets_of(self, comp):
+        '''
+        Return the set of nets a component designator is connected to.
+        '''
+        if self.comp_index is None:
+            self.comp_index = self.build_comp_index()
+        return self.comp_index.get(comp, frozenset())
+
+    def build_comp_index(self):
+        # Group nets by their component list first, so that each list is
+        # only scanned once.
+        groups = {}
+        for netname, components in self.netlist.items():
+            groups.setdefault(id(components), (components, []))[1].append(
+                netname)
+
+        index = {}
+        for components, netnames in groups.values():
+            for comp in set(comp for comp, _ in components):
+                index.setdefault(comp, []).append(netnames)
+        return {comp: frozenset(netname for netnames in all_netnames
+                                for netname in netnames)
+                for comp, all_netnames in index.items()}
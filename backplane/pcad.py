@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:03 AM +0000
+
+import re
+
+# One token: an opening/closing parenthesis, a double-quoted string (which may
+# contain escaped characters and parentheses), or a bare symbol.
+TOKEN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+
+STRING_PATTERN = r'"(?:[^"\\]|\\.)*"'
+
+# Everything up to the next parenthesis that is not part of a string.
+SKIP = re.compile(r'(?:[^()"]+|' + STRING_PATTERN + r')*')
+
+
+def nested_pattern(depth):
+    pattern = r'(?:[^()"]+|' + STRING_PATTERN + r')*'
+    for _ in range(depth):
+        pattern = r'(?:[^()"]+|' + STRING_PATTERN + r'|\(' + pattern + r'\))*'
+    return pattern
+
+
+# The remainder of a form with up to 4 levels of nested forms, which covers
+# every 'compInst' and 'attr' written by Altium, up to its closing parenthesis.
+# Deeper forms fall back to 'PcadTokenizer.skip_form'.
+SKIP_FORM = re.compile(nested_pattern(4) + r'\)')
+
+# A complete (node "COMP" "PIN") form.
+NODE = re.compile(
+    r'\s*\(node\s+"((?:[^"\\]|\\.)*)"\s+"((?:[^"\\]|\\.)*)"\s*\)')
+
+OPEN, CLOSE, STRING, SYMBOL = range(4)
+
+
+class PcadTokenizer(object):
+    '''
+    Incremental tokenizer for PCAD S-expressions, reading a file in chunks.
+
+    Only the current chunk (plus a possibly truncated token from the previous
+    one) is kept in memory.
+    '''
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def ensure(self, size):
+        # Make sure that at least 'size' characters are buffered, if possible.
+        while len(self.buf) - self.pos < size and not self.eof:
+            self.fill()
+
+    def match(self, regex, lookahead=1 << 14):
+        self.ensure(lookahead)
+        m = regex.match(self.buf, self.pos)
+        if m is not None and (m.end() < len(self.buf) or self.eof):
+            self.pos = m.end()
+            return m
+        return None
+
+    def next(self):
+        while True:
+            m = TOKEN.match(self.buf, self.pos)
+
+            # A token touching the end of the buffer may be cut in the middle.
+            if m is not None and (m.end() < len(self.buf) or self.eof):
+                self.pos = m.end()
+                for kind, value in enumerate(m.groups()):
+                    if value is not None:
+                        return kind, value
+
+            if not self.eof:
+                self.fill()
+            elif self.buf[self.pos:].strip():
+                raise ValueError('Malformed PCAD netlist near: {}'.format(
+                    self.buf[self.pos:self.pos+40]))
+            else:
+                return None, None
+
+    def expect(self, expected_kind):
+        kind, value = self.next()
+        if kind != expected_kind:
+            raise ValueError('Malformed PCAD netlist: unexpected {}'.format(
+                value))
+        return value
+
+    def skip_form(self):
+        # Skip the rest of the current form, without tokenizing it.
+        if self.match(SKIP_FORM) is not None:
+            return
+
+        depth = 1
+        while True:
+            self.pos = SKIP.match(self.buf, self.pos).end()
+
+            # Either the buffer is exhausted, or a string is cut in the middle.
+            if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                if not self.fill():
+                    raise ValueError('Unexpected end of PCAD netlist')
+                continue
+
+            char = self.buf[self.pos]
+            self.pos += 1
+            if char == '(':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+class PcadStreamReader(object):
+    '''
+    Streaming reader for PCAD netlists exported by Altium.
+
+    Only 'net' forms are parsed; 'compInst', 'globalAttrs' and all attributes
+    are skipped without being built. 'iter_nets' yields
+        (netname, [(component, pin), ...])
+    one net at a time; 'read' returns the same dictionary as
+    'PcadNaiveReader.read'.
+    '''
+    def __init__(self, filename, chunk_size=1 << 16):
+        self.filename = filename
+        self.chunk_size = chunk_size
+
+    def read(self):
+        return {netname: nodes for netname, nodes in self.iter_nets()}
+
+    def iter_nets(self):
+        with open(str(self.filename), 'r', encoding='utf-8',
+                  errors='replace') as f:
+            tokens = PcadTokenizer(f, self.chunk_size)
+
+            # (netlist "Netlist_1" ...)
+            tokens.expect(OPEN)
+            tokens.expect(SYMBOL)
+            tokens.expect(STRING)
+
+            while True:
+                kind, _ = tokens.next()
+                if kind == CLOSE:
+                    return
+                elif kind != OPEN:
+                    raise ValueError('Malformed PCAD netlist: {}'.format(
+                        self.filename))
+
+                if tokens.expect(SYMBOL) == 'net':
+                    yield self.read_net(tokens)
+                else:
+                    tokens.skip_form()
+
+    @staticmethod
+    def read_net(tokens):
+        # (net "NETNAME" (node "COMP" "PIN") ... (attr ...))
+        netname = tokens.expect(STRING)
+        nodes = []
+
+        while True:
+            node = tokens.match(NODE, 256)
+            if node is not None:
+                nodes.append(node.groups())
+                continue
+
+            kind, _ = tokens.next()
+            if kind == CLOSE:
+                return netname, nodes
+
+            if tokens.expect(SYMBOL) == 'node':
+                comp = tokens.expect(STRING)
+                pin = tokens.expect(STRING)
+                tokens.expect(CLOSE)
+                nodes.append((comp, pin))
+            else:
+                tokens.skip_form()
+
+
+def write_pcad_netlist(filename, netlist, title='Netlist_1'):
+    '''
+    Write a {netname: [(component, pin), ...]} dictionary as a minimal PCAD
+    netlist, with 'net' forms only.
+    '''
+    with open(str(filename), 'w') as f:
+        f.write('(netlist "{}"\n'.format(title))
+        for netname, nodes in netlist.items():
+            f.write('  (net "{}"\n'.format(netname))
+            for comp, pin in nodes:
+                f.write('    (node "{}" "{}")\n'.format(comp, pin))
+            f.write('  )\n')
+        f.write(')\n')
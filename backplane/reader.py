@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:40 AM +0000
+
+from pathlib import Path
+
+from pyUTM.io import YamlReader
+from pyUTM.common import flatten, transpose
+
+import backplane.descr
+from backplane.descr import PinTable
+
+
+# The readers below, and the layout of the tables they return, are defined in
+# these files; cached inputs are re-read as soon as any of them changes.
+reader_sources = [__file__, backplane.descr.__file__]
+
+
+def read_brkoutbrd_pin_assignments(filename):
+    BrkoutbrdReader = YamlReader(filename)
+    brkoutbrd_descr = BrkoutbrdReader.read()
+
+    brkoutbrd_data = map(transpose, brkoutbrd_descr.values())
+    brkoutbrd_nested_signals = list(map(
+        lambda x: [s for s in x['Signal ID'] if s is not None and s != 'GND'],
+        brkoutbrd_data
+    ))
+
+    # We intent to keep 'Signal ID' only, in a list.
+    return [item for sublist in brkoutbrd_nested_signals for item in sublist]
+
+
+def read_flattened_descr(filename, header):
+    # Stored column-wise: most values are shared by many pins.
+    Reader = YamlReader(filename)
+    return PinTable(Reader.read(flattener=lambda x: flatten(x, header)))
+
+
+def flattener_source(flattener):
+    return Path(flattener.__code__.co_filename)
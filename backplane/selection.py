@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:46 AM +0000
+
+import re
+
+from time import perf_counter
+
+from pyUTM.selection import RulePD
+
+
+class KeywordAutomaton(object):
+    '''
+    Find all keywords contained in a string with a single regex scan.
+    '''
+    def __init__(self, keywords):
+        keywords = sorted(set(keywords), key=len, reverse=True)
+
+        # A lookahead reports the longest keyword starting at each position.
+        # Shorter keywords hidden by it are contained in it, so they are added
+        # back from 'implied'.
+        self.regex = re.compile(
+            '(?=(' + '|'.join(map(re.escape, keywords)) + '))'
+        ) if keywords else None
+        self.implied = {kw: frozenset(k for k in keywords if k in kw)
+                        for kw in keywords}
+
+    def find(self, s):
+        found = set()
+        if self.regex is not None:
+            for m in self.regex.finditer(s):
+                found |= self.implied[m.group(1)]
+        return found
+
+
+class CompiledRulePD(RulePD):
+    '''
+    Dispatch each entry to the first matching rule of an ordered rule list.
+
+    A rule may declare keywords, of which at least one must be contained in
+    the 'Signal ID' ('signal_id_keywords') or the 'Note' ('note_keywords') of
+    an entry for the rule to possibly match. All declared keywords are looked
+    up with one scan per distinct Signal ID/Note, and only the rules that can
+    match are tried, in the original order. Rules without keywords are always
+    tried, so first-match semantics are identical to trying every rule.
+
+    Time spent in each rule is only measured if 'timed' is set, as timing
+    every call slows down dispatching.
+    '''
+    def __init__(self, rules, timed=False):
+        self.rules = rules
+        self.signal_id_keywords = [
+            self.keywords(r, 'signal_id_keywords') for r in rules]
+        self.note_keywords = [self.keywords(r, 'note_keywords') for r in rules]
+
+        self.signal_id_automaton = KeywordAutomaton(
+            kw for kws in self.signal_id_keywords if kws for kw in kws)
+        self.note_automaton = KeywordAutomaton(
+            kw for kws in self.note_keywords if kws for kw in kws)
+
+        self.dispatch_table = {}
+        self.matched = None
+
+        self.tries = [0] * len(rules)
+        self.hits = [0] * len(rules)
+        self.time = [0.0] * len(rules)
+
+        self.timed = timed
+        if timed:
+            self.match = self.timed_match
+            self.process = self.timed_process
+
+    @staticmethod
+    def keywords(rule, attr):
+        kws = getattr(rule, attr, None)
+        return None if kws is None else frozenset(kws)
+
+    def candidates(self, data):
+        signal_id = data['Signal ID']
+        note = data.get('Note')
+
+        try:
+            return self.dispatch_table[(signal_id, note)]
+        except KeyError:
+            pass
+
+        if signal_id is None:
+            # Can't be pre-filtered; let the rules decide.
+            candidates = list(range(len(self.rules)))
+        else:
+            found_signal_id = self.signal_id_automaton.find(signal_id)
+            found_note = self.note_automaton.find(note) if note is not None \
+                else set()
+            candidates = [
+                idx for idx in range(len(self.rules))
+                if (self.signal_id_keywords[idx] is None or
+                    self.signal_id_keywords[idx] & found_signal_id) and
+                (self.note_keywords[idx] is None or
+                 self.note_keywords[idx] & found_note)
+            ]
+
+        self.dispatch_table[(signal_id, note)] = candidates
+        return candidates
+
+    def match(self, data, connector):
+        self.matched = None
+
+        for idx in self.candidates(data):
+            self.tries[idx] += 1
+
+            if self.rules[idx].match(data, connector):
+                self.matched = idx
+                return True
+
+        return False
+
+    def process(self, data, connector):
+        idx = self.matched
+        self.hits[idx] += 1
+        return self.rules[idx].process(data, connector)
+
+    def timed_match(self, data, connector):
+        self.matched = None
+
+        for idx in self.candidates(data):
+            start = perf_counter()
+            result = self.rules[idx].match(data, connector)
+            self.time[idx] += perf_counter() - start
+            self.tries[idx] += 1
+
+            if result:
+                self.matched = idx
+                return True
+
+        return False
+
+    def timed_process(self, data, connector):
+        idx = self.matched
+        start = perf_counter()
+        result = self.rules[idx].process(data, connector)
+        self.time[idx] += perf_counter() - start
+        self.hits[idx] += 1
+        return result
+
+    def stats(self):
+        return [(rule.__class__.__name__, self.tries[idx], self.hits[idx],
+                 self.time[idx])
+                for idx, rule in enumerate(self.rules)]
+
+    def report(self, title):
+        output = [title]
+        for name, tries, hits, time in self.stats():
+            line = '  {:<28} tried {:>6} times, used {:>6} times'.format(
+                name, tries, hits)
+            if self.timed:
+                line += ', {:>8.2f} ms'.format(time*1000)
+            output.append(line)
+        return output
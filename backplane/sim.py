@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 08:55 AM +0000
+
+import re
+
+
+class DisjointSet(object):
+    '''
+    Union-find over hashable items, with path halving and union by size.
+    '''
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item1, item2):
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            return root1
+
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size[root2]
+        return root1
+
+
+class NetHopper(object):
+    '''
+    Find nets that are equivalent because they are connected through passable
+    components (resistors, capacitors, net ties, ...), the same way as
+    'pyUTM.sim.CurrentFlow'.
+
+    Nets sharing a passable component are merged with a disjoint-set, so the
+    whole netlist is processed in near-linear time.
+    '''
+    def __init__(self, passables):
+        self.passables = passables
+        self.regex = re.compile('|'.join(
+            '(?:{})'.format(p) for p in passables))
+        self.memo = {}
+
+    def passable(self, comp):
+        try:
+            return self.memo[comp]
+        except KeyError:
+            result = self.memo[comp] = self.regex.search(comp) is not None
+            return result
+
+    def comp_to_nets(self, netlist):
+        # Only passable components are indexed; they are the only ones that
+        # connect nets.
+        index = {}
+        for netname, components in netlist.items():
+            for comp, _ in components:
+                if self.passable(comp):
+                    index.setdefault(comp, []).append(netname)
+        return index
+
+    def do(self, netlist):
+        '''
+        Return all equivalent net groups, in the order of 'netlist', like
+        'CurrentFlow.do'.
+        '''
+        nets = DisjointSet()
+        for netname in netlist.keys():
+            nets.add(netname)
+
+        for connected in self.comp_to_nets(netlist).values():
+            first = connected[0]
+            for netname in connected[1:]:
+                nets.union(first, netname)
+
+        groups = {}
+        for netname in netlist.keys():
+            groups.setdefault(nets.find(netname), []).append(netname)
+        return list(groups.values())
+
+    def hop(self, netlist):
+        '''
+        Make all equivalent nets share the same, merged component list, in
+        place. This is equivalent to:
+            PcadReader.make_equivalent_nets_identical(
+                netlist, CurrentFlow(passables).do(netlist))
+        Return the equivalent net groups.
+        '''
+        groups = self.do(netlist)
+
+        for group in groups:
+            if len(group) == 1:
+                continue
+
+            merged = []
+            seen = set()
+            for netname in group:
+                for node in netlist[netname]:
+                    if node not in seen:
+                        seen.add(node)
+                        merged.append(node)
+
+            for netname in group:
+                netlist[netname] = merged
+
+        return groups
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:18 AM +0000
+
+
+class VariantSet(object):
+    '''
+    Backplane variants, each defined by a predicate telling whether an entry
+    is populated in it, e.g.:
+        VariantSet([('alpha', lambda entry: True), ...])
+
+    An entry is tagged once with the bitmask of the variants populating it;
+    variants then select entries by testing their bit.
+    '''
+    def __init__(self, variants):
+        self.names = [name for name, _ in variants]
+        self.predicates = [predicate for _, predicate in variants]
+        self.bits = {name: 1 << idx for idx, name in enumerate(self.names)}
+
+    def mask(self, entry):
+        mask = 0
+        for idx, predicate in enumerate(self.predicates):
+            if predicate(entry):
+                mask |= 1 << idx
+        return mask
+
+    def partition(self, masked_items):
+        '''
+        Group the variants selecting the same subset of '[(mask, item), ...]'.
+        Return [(mask of variants, [item, ...]), ...]; variants selecting no
+        item are left out.
+        '''
+        groups = {}
+        for bit in self.bits.values():
+            selected = tuple(idx for idx, (mask, _) in enumerate(masked_items)
+                             if mask & bit)
+            if selected:
+                groups[selected] = groups.get(selected, 0) | bit
+
+        return [(mask, [masked_items[idx][1] for idx in selected])
+                for selected, mask in groups.items()]
+
+
+class VariantRecords(object):
+    '''
+    Records shared by all variants they are identical in.
+
+    Each key holds a list of (mask of variants, record). Updating a record for
+    only some of the variants sharing it gives these variants their own copy
+    first.
+    '''
+    def __init__(self, variants):
+        self.variants = variants
+        self.records = {}
+
+    def add(self, key, mask, record):
+        self.records.setdefault(key, []).append((mask, record))
+
+    def update(self, key, mask, fields):
+        entries = self.records.get(key, [])
+        for idx, (record_mask, record) in enumerate(list(entries)):
+            shared = record_mask & mask
+            if not shared:
+                continue
+
+            if shared != record_mask:
+                entries[idx] = (record_mask & ~mask, record)
+                record = dict(record)
+                entries.append((shared, record))
+            record.update(fields)
+
+    def select(self, name):
+        bit = self.variants.bits[name]
+        return {key: record for key, entries in self.records.items()
+                for mask, record in entries if mask & bit}
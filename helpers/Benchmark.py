@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:45 AM +0000
+#
+# Time each stage of the mapping and checking pipelines, on the real inputs
+# and on synthetic backplanes with more connectors (see SyntheticBackplane.py),
+# and store the timings in a JSON file that can be compared across commits.
+
+import os
+import copy
+import json
+import time
+import runpy
+import shutil
+import platform
+import subprocess
+
+from pathlib import Path
+from datetime import datetime
+from argparse import ArgumentParser
+from io import StringIO
+from contextlib import redirect_stdout
+from statistics import median
+from tempfile import TemporaryDirectory
+
+repo_dir = Path(__file__).resolve().parent.parent
+
+import sys
+sys.path.insert(0, str(repo_dir))
+sys.path.insert(0, str(repo_dir / Path('pyUTM')))
+
+from pyUTM.io import YamlReader, XLWriter
+from pyUTM.io import write_to_csv, csv_line, prepare_descr_for_xlsx_output
+from pyUTM.common import flatten
+from pyUTM.selection import SelectorPD
+from backplane.brkoutbrd import BrkoutbrdIndex
+from backplane.descr import PinTable
+from backplane.selection import CompiledRulePD
+from backplane.pcad import PcadStreamReader
+from backplane.sim import NetHopper
+
+import AltiumNetlistGen as gen
+import NetlistCheck as check
+import SyntheticBackplane as synth
+
+netlist_dir = Path('input') / Path('backplane_netlists')
+
+mapping_stages = ['yaml_load', 'flatten', 'remap', 'diff_pairs',
+                  'selector_pd', 'csv_write', 'xlsx_write']
+netlist_stages = ['pcad_parse', 'hopping', 'selector_net_raw',
+                  'selector_net_hopped', 'selector_net_copy_paste']
+stages = mapping_stages + netlist_stages + ['fiber_asic_map']
+
+
+###########
+# Helpers #
+###########
+
+def parse_input(descr='Benchmark each stage of the backplane pipelines.'):
+    parser = ArgumentParser(description=descr)
+
+    parser.add_argument('-o', '--output',
+                        default=None,
+                        help='JSON output filename. Default: a time-stamped '
+                             'file under log/.')
+
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=3,
+                        help='number of timed runs of each stage.')
+
+    parser.add_argument('-s', '--scale',
+                        dest='scales',
+                        type=int,
+                        action='append',
+                        help='run on a synthetic backplane with this many '
+                             'times the connectors of the real one; 1 runs '
+                             'on the real inputs. Default: 1, 2, 4 and 8.')
+
+    parser.add_argument('--stage',
+                        dest='stages',
+                        action='append',
+                        choices=stages,
+                        help='only run the specified stage(s).')
+
+    parser.add_argument('--compare',
+                        metavar='JSON',
+                        help='print the change w.r.t. a previous output.')
+
+    return parser.parse_args()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode().strip()
+    except Exception:
+        return None
+
+
+def fresh_pipeline():
+    # Forget the results memoized by the shared pipeline, as a new process
+    # would; parsed inputs are still read from the disk cache.
+    gen.pipeline.computed.clear()
+    return ()
+
+
+class Benchmark(object):
+    def __init__(self, repeat=3, stages=stages):
+        self.repeat = repeat
+        self.stages = stages
+        self.results = []
+
+    def enabled(self, stages):
+        return any(stage in self.stages for stage in stages)
+
+    def run(self, stage, func, setup=lambda: (), scale=1, **info):
+        '''
+        Time 'func(*setup())', 'repeat' times. 'setup' is not timed, and
+        provides fresh inputs to each run.
+        '''
+        if stage not in self.stages:
+            return
+
+        result = dict(stage=stage, scale=scale, **info)
+        runs = []
+        try:
+            for _ in range(self.repeat):
+                args = setup()
+                # Warnings printed by the pipeline are not of interest here.
+                with redirect_stdout(StringIO()):
+                    start = time.perf_counter()
+                    func(*args)
+                    runs.append(time.perf_counter() - start)
+        except Exception as err:
+            result['error'] = '{}: {}'.format(type(err).__name__, err)
+        else:
+            result.update(min=min(runs), median=median(runs), runs=runs)
+
+        self.results.append(result)
+        print(self.format(result))
+
+    @staticmethod
+    def key(result):
+        return (result['stage'], result['scale'],
+                tuple(sorted((k, v) for k, v in result.items()
+                             if k not in ('stage', 'scale', 'min', 'median',
+                                          'runs', 'error'))))
+
+    @staticmethod
+    def format(result, ref=None):
+        label = ' '.join(str(v) for k, v in sorted(result.items())
+                         if k not in ('stage', 'scale', 'min', 'median',
+                                      'runs', 'error'))
+        line = '{:<24} x{:<2} {:<40}'.format(result['stage'], result['scale'],
+                                             label)
+        if 'error' in result:
+            return line + ' ' + result['error']
+
+        line += ' {:>9.4f} s'.format(result['min'])
+        if ref is not None and 'min' in ref and ref['min'] > 0:
+            line += ' ({:+.1%})'.format(result['min']/ref['min'] - 1)
+        return line
+
+
+##########################
+# Altium netlist mapping #
+##########################
+
+def bench_mapping(bench, scale):
+    if not bench.enabled(mapping_stages):
+        return
+
+    for name, filename in [('PT', gen.pt_filename),
+                           ('DCB', gen.dcb_filename),
+                           ('brkoutbrd', gen.brkoutbrd_filename)]:
+        bench.run('yaml_load', YamlReader(filename).read, scale=scale,
+                  input=name)
+
+    pt_yaml = YamlReader(gen.pt_filename).read()
+    dcb_yaml = YamlReader(gen.dcb_filename).read()
+    brkoutbrd_signals = gen.read_brkoutbrd_pin_assignments(
+        gen.brkoutbrd_filename)
+
+    bench.run('flatten', lambda pt, dcb: (
+        {k: flatten(v, 'Pigtail pin') for k, v in pt.items()},
+        {k: flatten(v, 'SEAM pin') for k, v in dcb.items()}),
+        lambda: copy.deepcopy((pt_yaml, dcb_yaml)), scale)
+
+    pt_proto = {k: flatten(v, 'Pigtail pin') for k, v in pt_yaml.items()}
+    dcb_proto = {k: flatten(v, 'SEAM pin') for k, v in dcb_yaml.items()}
+
+    def fresh_protos():
+        # Stored as by 'read_flattened_descr', so that variants are derived
+        # the same way as in the scripts.
+        return PinTable(pt_proto), PinTable(dcb_proto)
+
+    for bp_type, (derivation, index_gen) in gen.variant_derivations.items():
+        def fresh_index():
+            # Lookups are memoized by the index, so each run gets its own.
+            return (index_gen(BrkoutbrdIndex(brkoutbrd_signals)),)
+
+        def derived():
+            pt_descr, dcb_descr = derivation(*fresh_protos())
+            gen.match_diff_pairs(pt_descr, dcb_descr)
+            gen.match_dcb_side_signal_id(pt_descr, dcb_descr)
+            return pt_descr, dcb_descr
+
+        bench.run('remap', derivation, fresh_protos, scale, bp_type=bp_type)
+
+        bench.run('diff_pairs', lambda pt_descr, dcb_descr: (
+            gen.match_diff_pairs(pt_descr, dcb_descr),
+            gen.match_dcb_side_signal_id(pt_descr, dcb_descr)),
+            lambda: derivation(*fresh_protos()), scale, bp_type=bp_type)
+
+        pt_descr, dcb_descr = derived()
+
+        bench.run('selector_pd', lambda index: SelectorPD(
+            pt_descr, [CompiledRulePD(gen.pt_rules_gen(index))]).do(),
+            fresh_index, scale, bp_type=bp_type, input='PT')
+        bench.run('selector_pd', lambda index: SelectorPD(
+            dcb_descr, [CompiledRulePD(gen.dcb_rules_gen(index))]).do(),
+            fresh_index, scale, bp_type=bp_type, input='DCB')
+
+        pt_result = SelectorPD(
+            pt_descr, [CompiledRulePD(gen.pt_rules_gen(*fresh_index()))]).do()
+
+        with TemporaryDirectory() as tmp_dir:
+            bench.run('csv_write', lambda: write_to_csv(
+                Path(tmp_dir) / Path('pt.csv'), pt_result, csv_line),
+                scale=scale, bp_type=bp_type, input='PT')
+            bench.run('xlsx_write', lambda: XLWriter(
+                Path(tmp_dir) / Path('pt.xlsx')).write(
+                    prepare_descr_for_xlsx_output(pt_descr.materialize())),
+                scale=scale, bp_type=bp_type, input='PT')
+
+
+######################
+# Netlist processing #
+######################
+
+def bench_netlist(bench, scale):
+    if not bench.enabled(netlist_stages):
+        return
+
+    for netlist in sorted(netlist_dir.glob('*.net')):
+        bp_type = check.find_backplane_type(str(netlist), 'true')
+        info = dict(input=netlist.stem)
+
+        bench.run('pcad_parse', PcadStreamReader(netlist).read, scale=scale,
+                  **info)
+
+        netlist_dict = PcadStreamReader(netlist).read()
+        check.comp_classifier.classify_all(netlist_dict)
+
+        # Passable components are memoized by the hopper, so each run gets
+        # its own.
+        bench.run('hopping', lambda hopper, netlist_dict: hopper.hop(
+            netlist_dict), lambda: (NetHopper(check.hopping_regexes),
+                                    dict(netlist_dict)), scale, **info)
+
+        hopped = dict(netlist_dict)
+        NetHopper(check.hopping_regexes).hop(hopped)
+        backplane_netlist_result, all_diff_nets = check.reference_gen(bp_type)
+
+        bench.run('selector_net_raw', check.check_raw_netlist,
+                  lambda: (netlist_dict, all_diff_nets), scale, **info)
+        bench.run('selector_net_hopped', check.check_hopped_netlist,
+                  lambda: (hopped, backplane_netlist_result), scale, **info)
+        bench.run('selector_net_copy_paste', check.check_copy_paste_netlist,
+                  lambda: (hopped, backplane_netlist_result), scale, **info)
+
+
+def bench_scale(bench, scale):
+    if not bench.enabled(mapping_stages + netlist_stages):
+        return
+
+    # The shared pipeline must not serve results of the previous inputs.
+    fresh_pipeline()
+    if scale == 1:
+        bench_mapping(bench, scale)
+        bench_netlist(bench, scale)
+        return
+
+    with TemporaryDirectory() as tmp_dir:
+        args = synth.parse_input(['-n', str(12*scale)])
+        try:
+            # This also moves to the synthetic backplane, whose inputs are
+            # read relative to the working directory.
+            with redirect_stdout(StringIO()):
+                synth.generate_backplane(args, Path(tmp_dir))
+            bench_mapping(bench, scale)
+            bench_netlist(bench, scale)
+        finally:
+            fresh_pipeline()
+            os.chdir(str(repo_dir))
+
+
+#########################
+# ASIC to fiber mapping #
+#########################
+
+def bench_fiber_asic_map(bench):
+    if not bench.enabled(['fiber_asic_map']):
+        return
+
+    # The script writes to 'output/' relative to the working directory: run it
+    # in a scratch directory, with a copy of 'output/', to leave the real
+    # mapping untouched.
+    (repo_dir / Path('cache')).mkdir(exist_ok=True)
+
+    with TemporaryDirectory() as tmp_dir:
+        for path in ['input', 'pyUTM', 'cache']:
+            (Path(tmp_dir) / Path(path)).symlink_to(repo_dir / Path(path))
+        shutil.copytree(str(repo_dir / Path('output')),
+                        str(Path(tmp_dir) / Path('output')))
+
+        os.chdir(tmp_dir)
+        try:
+            # Each run starts from an empty pipeline, as the script would.
+            bench.run('fiber_asic_map', lambda: runpy.run_path(
+                str(repo_dir / Path('FiberAsicMap.py')), run_name='__main__'),
+                fresh_pipeline)
+        finally:
+            os.chdir(str(repo_dir))
+
+
+if __name__ == '__main__':
+    args = parse_input()
+    scales = args.scales or [1, 2, 4, 8]
+
+    # Filenames given by the user are relative to the current directory,
+    # while the scripts use paths relative to the repository root.
+    output_filename = Path(args.output).resolve() if args.output else None
+    compare_filename = Path(args.compare).resolve() if args.compare else None
+    os.chdir(str(repo_dir))
+
+    bench = Benchmark(args.repeat, args.stages or stages)
+    for scale in scales:
+        bench_scale(bench, scale)
+    bench_fiber_asic_map(bench)
+
+    if output_filename is None:
+        output_filename = Path('log') / Path('Benchmark-{}.json'.format(
+            datetime.now().strftime("%Y-%m-%d_%H%M%S")))
+
+    with open(str(output_filename), 'w') as f:
+        json.dump({
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'scales': scales,
+            'results': bench.results
+        }, f, indent=2)
+    print('Results written to {}'.format(output_filename))
+
+    if compare_filename:
+        with open(str(compare_filename)) as f:
+            ref = {Benchmark.key(r): r for r in json.load(f)['results']}
+
+        print('\nChange w.r.t. {}:'.format(args.compare))
+        for result in bench.results:
+            print(Benchmark.format(result, ref.get(Benchmark.key(result))))
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:45 AM +0000
+#
+# Generate a synthetic backplane, seeded from the real inputs, with an
+# arbitrary number of connectors and pins: PT, DCB and breakout board YAML
+# files, plus the matching PCAD netlists. The output directory is laid out
+# like this repository, so the scripts can be run from it as they are, e.g.:
+#   cd synthetic && python ../AltiumNetlistGen.py
+
+import os
+import re
+import yaml
+import random
+
+from pathlib import Path
+from argparse import ArgumentParser
+
+repo_dir = Path(__file__).resolve().parent.parent
+
+import sys
+sys.path.insert(0, str(repo_dir))
+sys.path.insert(0, str(repo_dir / Path('pyUTM')))
+
+from backplane.pcad import write_pcad_netlist
+
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+
+input_dir = repo_dir / Path('input')
+
+brkoutbrd_filename = Path('brkoutbrd_pin_assignments.yml')
+pt_filename = Path('backplane_mapping_PT.yml')
+dcb_filename = Path('backplane_mapping_DCB.yml')
+netlist_dir = Path('backplane_netlists')
+
+bp_types = ['true', 'mirror']
+
+
+###########
+# Helpers #
+###########
+
+def parse_input(argv=None,
+                descr='Generate a synthetic backplane for load testing.'):
+    parser = ArgumentParser(description=descr)
+
+    parser.add_argument('-o', '--output-dir',
+                        type=Path,
+                        default=repo_dir / Path('synthetic'),
+                        help='directory to write the synthetic inputs to. '
+                             'Default: synthetic/.')
+
+    parser.add_argument('-n', '--connectors',
+                        type=int,
+                        default=12,
+                        help='number of Pigtail (and DCB) connectors; at '
+                             'least the 12 of the real backplane.')
+
+    parser.add_argument('-m', '--pins',
+                        type=int,
+                        default=None,
+                        help='number of pins per connector. Default: same '
+                             'as the real connectors.')
+
+    parser.add_argument('--diff-ratio',
+                        type=float,
+                        default=1.,
+                        help='fraction of connected differential pairs that '
+                             'are kept; the others are left unused.')
+
+    parser.add_argument('--depop-ratio',
+                        type=float,
+                        default=None,
+                        help="fraction of Pigtail pins (or differential pairs) "
+                             "marked as 'Alpha only'. Default: as in the "
+                             "real backplane.")
+
+    parser.add_argument('--resistor-ratio',
+                        type=float,
+                        default=0.1,
+                        help='fraction of nets split in two by a series '
+                             'resistor in the netlists, to be hopped over.')
+
+    parser.add_argument('-s', '--seed',
+                        type=int,
+                        default=0,
+                        help='random seed.')
+
+    parser.add_argument('-t', '--type',
+                        dest='bp_types',
+                        action='append',
+                        choices=bp_types,
+                        help='only generate netlists of the specified '
+                             'backplane type(s).')
+
+    args = parser.parse_args(argv)
+    if args.connectors < 12:
+        parser.error('at least 12 connectors are needed')
+    return args
+
+
+def read_yaml(filename):
+    with open(str(filename)) as f:
+        return yaml.load(f, Loader=Loader)
+
+
+def write_yaml(filename, descr):
+    with open(str(filename), 'w') as f:
+        yaml.dump(descr, f, Dumper=Dumper, default_flow_style=False,
+                  sort_keys=False)
+
+
+def items(rows):
+    # YAML descriptions are lists of single-entry {pin: attributes} dicts.
+    return [next(iter(row.items())) for row in rows]
+
+
+def connector_idx(conn):
+    return int(re.search(r'\d+$', conn).group())
+
+
+# Relabeling ###################################################################
+
+connector_regex = re.compile(r'(?<![A-Za-z])(JPL|JPU|JT|JP|JD)(\d+)')
+pin_regex = re.compile(r'^([A-Za-z]*)(\d+)$')
+signal_regex = re.compile(r'^(.*?)(_[PN])?$')
+
+
+class Relabeler(object):
+    '''
+    Label the connectors and pins of copies of the real backplane.
+
+    Copy 'c' of connector 'JP3' is 'JP{3+12c}', and references to other
+    connectors are shifted the same way. Repetition 'r' of pin 'A1' of a
+    connector with pins 1 to 40 is 'A{1+40r}'.
+    '''
+    def __init__(self, *descrs):
+        self.counts = {}
+        for descr in descrs:
+            for conn in descr.keys():
+                prefix = connector_regex.fullmatch(conn).group(1)
+                self.counts[prefix] = self.counts.get(prefix, 0) + 1
+
+        self.pin_offsets = {}
+        for descr in descrs:
+            for conn, rows in descr.items():
+                self.pin_offsets[conn] = max(
+                    int(pin_regex.fullmatch(str(pin)).group(2))
+                    for pin, _ in items(rows))
+
+    def connector(self, s, copy):
+        if copy == 0 or not isinstance(s, str):
+            return s
+        return connector_regex.sub(
+            lambda m: m.group(1) + str(
+                int(m.group(2)) + copy*self.counts.get(m.group(1), 0)),
+            s)
+
+    def pin(self, pin, conn, rep):
+        if rep == 0:
+            return pin
+        letters, num = pin_regex.fullmatch(pin).groups()
+        return letters + str(int(num) + rep*self.pin_offsets[conn])
+
+    @staticmethod
+    def signal(signal, rep):
+        # Keep the polarity suffix of differential signals last.
+        if rep == 0:
+            return signal
+        base, polarity = signal_regex.fullmatch(signal).groups()
+        return '{}_R{}{}'.format(base, rep, polarity or '')
+
+
+##############
+# Generation #
+##############
+
+def scale_descr(descr, relabeler, connectors, pins, slot_key, pin_key):
+    '''
+    Return {conn: [(pin, attributes), ...]} with 'connectors' connectors of
+    'pins' pins each, copied from the real connectors of 'descr'.
+
+    Signals only found on a single pin of a real connector get a distinct
+    name on each repeated pin; shared ones (GND, power rails) don't.
+    '''
+    seeds = sorted(descr.keys(), key=connector_idx)
+    result = {}
+
+    for idx in range(connectors):
+        copy, seed = divmod(idx, len(seeds))
+        seed = seeds[seed]
+        rows = items(descr[seed])
+
+        signal_count = {}
+        for _, attrs in rows:
+            signal = attrs['Signal ID']
+            signal_count[signal] = signal_count.get(signal, 0) + 1
+
+        scaled = []
+        for pos in range(len(rows) if pins is None else pins):
+            rep, pos = divmod(pos, len(rows))
+            pin, attrs = rows[pos]
+
+            new_attrs = {key: relabeler.connector(value, copy)
+                         for key, value in sorted(attrs.items())}
+
+            signal = attrs['Signal ID']
+            if signal is not None and signal_count[signal] == 1:
+                new_attrs['Signal ID'] = relabeler.signal(
+                    new_attrs['Signal ID'], rep)
+
+            if attrs[slot_key] is not None and attrs[pin_key] is not None:
+                new_attrs[pin_key] = relabeler.pin(
+                    str(attrs[pin_key]), attrs[slot_key], rep)
+
+            scaled.append((relabeler.pin(str(pin), seed, rep), new_attrs))
+
+        result[relabeler.connector(seed, copy)] = scaled
+
+    return result
+
+
+def scale_brkoutbrd(descr, relabeler, copies):
+    result = {}
+    for copy in range(copies):
+        for conn, rows in descr.items():
+            result[relabeler.connector(conn, copy)] = [
+                (pin, {key: relabeler.connector(value, copy)
+                       for key, value in attrs.items()})
+                for pin, attrs in items(rows)]
+    return result
+
+
+def disconnect(attrs):
+    attrs.update({'DCB slot': None, 'GBTx ID': None, 'Note': 'Unused',
+                  'SEAM pin': None})
+
+
+def diff_pair_key(conn, attrs):
+    # Both legs of a differential pair share a key.
+    base, polarity = signal_regex.fullmatch(attrs['Signal ID'] or '').groups()
+    return (conn, base) if polarity else None
+
+
+def connected(pt_descr):
+    for conn, rows in pt_descr.items():
+        for pin, attrs in rows:
+            if attrs['DCB slot'] is not None and attrs['Note'] != 'Unused':
+                yield conn, pin, attrs
+
+
+def drop_diff_pairs(pt_descr, ratio, rng):
+    kept = {}
+    dropped = set()
+
+    for conn, pin, attrs in list(connected(pt_descr)):
+        key = diff_pair_key(conn, attrs)
+        if key is None:
+            continue
+        if key not in kept:
+            kept[key] = rng.random() < ratio
+        if not kept[key]:
+            disconnect(attrs)
+            dropped.add((conn, pin))
+
+    return dropped
+
+
+def depopulate(pt_descr, ratio, rng):
+    # Both legs of a differential pair must have the same note, whether they
+    # are connected or not.
+    depopulated = {}
+    for conn, rows in pt_descr.items():
+        for _, attrs in rows:
+            if attrs['Note'] not in (None, 'Alpha only'):
+                continue
+            key = diff_pair_key(conn, attrs) or id(attrs)
+            if key not in depopulated:
+                depopulated[key] = rng.random() < ratio
+            attrs['Note'] = 'Alpha only' if depopulated[key] else None
+
+
+def remove_dangling(pt_descr, dcb_descr, dropped=()):
+    '''
+    Disconnect pins referring to pins that weren't generated, or that were
+    disconnected, so that both sides stay consistent.
+    '''
+    dcb_pins = set((conn, pin) for conn, rows in dcb_descr.items()
+                   for pin, _ in rows)
+    pt_pins = set((conn, pin) for conn, rows in pt_descr.items()
+                  for pin, _ in rows)
+    pt_pins.difference_update(dropped)
+
+    for conn, rows in pt_descr.items():
+        for pin, attrs in rows:
+            if attrs['DCB slot'] is not None and \
+                    (attrs['DCB slot'], attrs['SEAM pin']) not in dcb_pins:
+                disconnect(attrs)
+                pt_pins.discard((conn, pin))
+
+    for conn, rows in dcb_descr.items():
+        for pin, attrs in rows:
+            if attrs['Pigtail slot'] is not None and \
+                    (attrs['Pigtail slot'], attrs['Pigtail pin']) \
+                    not in pt_pins:
+                attrs.update({'Pigtail pin': None, 'Pigtail slot': None})
+
+
+def generate_descrs(args):
+    brkoutbrd_descr = read_yaml(input_dir / brkoutbrd_filename)
+    pt_descr = read_yaml(input_dir / pt_filename)
+    dcb_descr = read_yaml(input_dir / dcb_filename)
+
+    relabeler = Relabeler(brkoutbrd_descr, pt_descr, dcb_descr)
+    rng = random.Random(args.seed)
+
+    pt_scaled = scale_descr(pt_descr, relabeler, args.connectors, args.pins,
+                            'DCB slot', 'SEAM pin')
+    dcb_scaled = scale_descr(dcb_descr, relabeler, args.connectors, args.pins,
+                             'Pigtail slot', 'Pigtail pin')
+    brkoutbrd_scaled = scale_brkoutbrd(
+        brkoutbrd_descr, relabeler, -(-args.connectors // len(pt_descr)))
+
+    dropped = set()
+    if args.diff_ratio < 1:
+        dropped = drop_diff_pairs(pt_scaled, args.diff_ratio, rng)
+    if args.depop_ratio is not None:
+        depopulate(pt_scaled, args.depop_ratio, rng)
+    remove_dangling(pt_scaled, dcb_scaled, dropped)
+
+    return brkoutbrd_scaled, pt_scaled, dcb_scaled
+
+
+# Netlists #####################################################################
+
+def split_nets(netlist, ratio, rng):
+    '''
+    Split a fraction of the nets in two, joined by a series resistor, as
+    Altium would export them.
+    '''
+    result = {}
+    resistor_idx = 0
+
+    for netname, nodes in netlist.items():
+        if len(nodes) > 1 and rng.random() < ratio:
+            resistor_idx += 1
+            resistor = 'R{}'.format(resistor_idx)
+            result[netname] = [nodes[0], (resistor, '1')]
+            result['Net{}_2'.format(resistor)] = nodes[1:] + [(resistor, '2')]
+        else:
+            result[netname] = nodes
+
+    return result
+
+
+def generate_netlists(args):
+    # Imported here, as the pipeline reads its inputs relative to the working
+    # directory, which is the output directory by now.
+    import NetlistCheck as check
+
+    rng = random.Random(args.seed)
+    for bp_type in args.bp_types or bp_types:
+        netlist, _ = check.reference_gen(bp_type)
+        filename = Path('input') / netlist_dir / Path(
+            'backplane_{}_type_synthetic.net'.format(bp_type))
+
+        netlist = split_nets(netlist, args.resistor_ratio, rng)
+        write_pcad_netlist(filename, netlist, 'Synthetic')
+        print('{}: {} nets'.format(filename, len(netlist)))
+
+
+def generate_backplane(args, output_dir):
+    '''
+    Write the synthetic inputs and netlists under 'output_dir', which is the
+    working directory afterwards.
+    '''
+    for directory in [Path('input') / netlist_dir, Path('output'),
+                      Path('log')]:
+        (output_dir / directory).mkdir(parents=True, exist_ok=True)
+
+    # The scripts look for pyUTM relative to the working directory.
+    pyutm_link = output_dir / Path('pyUTM')
+    if not pyutm_link.exists():
+        pyutm_link.symlink_to(repo_dir / Path('pyUTM'))
+
+    for filename, descr in zip(
+            [brkoutbrd_filename, pt_filename, dcb_filename],
+            generate_descrs(args)):
+        write_yaml(output_dir / Path('input') / filename,
+                   {conn: [{pin: attrs} for pin, attrs in rows]
+                    for conn, rows in descr.items()})
+        print('{}: {} connectors, {} pins'.format(
+            output_dir / Path('input') / filename, len(descr),
+            sum(len(rows) for rows in descr.values())))
+
+    os.chdir(str(output_dir))
+    generate_netlists(args)
+
+
+if __name__ == '__main__':
+    args = parse_input()
+    generate_backplane(args, args.output_dir.resolve())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:48 AM +0000
+
+import sys
+sys.path.insert(0, '.')
+
+import pickle
+import unittest
+
+from copy import deepcopy
+
+from backplane.descr import PinTable, LayeredDescr
+
+
+def proto_gen():
+    return PinTable({
+        'JP0': [
+            {'Pigtail pin': 'A1', 'Pigtail slot': 'JP0', 'Note': None},
+            {'Pigtail pin': 'A2', 'Pigtail slot': 'JP1',
+             'Note': 'Alpha only'},
+        ]
+    })
+
+
+class PinTableTester(unittest.TestCase):
+    def test_rows(self):
+        proto = proto_gen()
+        self.assertEqual(proto['JP0'][1]['Pigtail slot'], 'JP1')
+        self.assertEqual(proto['JP0'][0].copy(), {
+            'Pigtail pin': 'A1', 'Pigtail slot': 'JP0', 'Note': None})
+
+    def test_copies_are_dicts(self):
+        row = proto_gen()['JP0'][0]
+        for copied in [row.copy(), deepcopy(row),
+                       pickle.loads(pickle.dumps(row))]:
+            self.assertIs(type(copied), dict)
+            self.assertEqual(copied, row.copy())
+
+    def test_where(self):
+        proto = proto_gen()
+        rows = proto.where('JP0', 'Note', lambda x: x is not None)
+        self.assertEqual([r['Pigtail pin'] for r in rows], ['A2'])
+
+    def test_read_only(self):
+        proto = proto_gen()
+        proto.writable = False
+        with self.assertRaises(TypeError):
+            proto['JP0'][0]['Note'] = 'Beta only'
+        with self.assertRaises(TypeError):
+            proto['JP0'][0]['DCB signal ID'] = 'JD0_CLK_P'
+
+
+class ViewIsolationTester(unittest.TestCase):
+    def setUp(self):
+        self.proto = proto_gen()
+        self.view = self.proto.view(
+            {'JP3': 'JP0'}, {'Pigtail slot': {'JP0': 'JP2', 'JP1': 'JP3'}})
+
+    def test_view(self):
+        self.assertEqual(list(self.view.keys()), ['JP3'])
+        self.assertEqual(
+            [r['Pigtail slot'] for r in self.view['JP3']], ['JP2', 'JP3'])
+        # Values of the proto are left as is.
+        self.assertEqual(
+            [r['Pigtail slot'] for r in self.proto['JP0']], ['JP0', 'JP1'])
+
+    def test_proto_read_only_once_viewed(self):
+        with self.assertRaises(TypeError):
+            self.proto['JP0'][0]['Note'] = 'Beta only'
+        with self.assertRaises(TypeError):
+            self.proto['JP0'][0]['DCB signal ID'] = 'JD0_CLK_P'
+        with self.assertRaises(TypeError):
+            self.view['JP3'][0]['Note'] = 'Beta only'
+
+    def test_layered_descr(self):
+        descr = LayeredDescr(self.proto, {'JP3': 'JP0'},
+                             {'Pigtail slot': {'JP0': 'JP2', 'JP1': 'JP3'}})
+        descr['JP3'][0]['Note'] = 'Beta only'
+        descr['JP3'][0]['DCB signal ID'] = 'JD0_CLK_P'
+
+        self.assertEqual(descr['JP3'][0]['Note'], 'Beta only')
+        self.assertEqual(descr['JP3'][0]['Pigtail slot'], 'JP2')
+        self.assertEqual(descr['JP3'][0]['DCB signal ID'], 'JD0_CLK_P')
+
+        # The proto, and other variants derived from it, are unchanged.
+        other = LayeredDescr(self.proto)
+        for row in [self.proto['JP0'][0], other['JP0'][0]]:
+            self.assertIsNone(row['Note'])
+            self.assertEqual(row['Pigtail slot'], 'JP0')
+            self.assertNotIn('DCB signal ID', row)
+
+
+class LazyRowsTester(unittest.TestCase):
+    def setUp(self):
+        self.descr = LayeredDescr(proto_gen(), {'JP3': 'JP0'},
+                                  {'Pigtail slot': {'JP0': 'JP2', 'JP1': 'JP3'}})
+
+    def test_rows_created_on_access(self):
+        rows = self.descr['JP3']
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows.written, {})
+        self.assertEqual([r['Pigtail slot'] for r in rows], ['JP2', 'JP3'])
+        self.assertEqual([r['Pigtail pin'] for r in rows[-1:]], ['A2'])
+
+    def test_written_rows_agree(self):
+        row = self.descr['JP3'][1]
+        row['Note'] = 'Beta only'
+        self.descr['JP3'][-1]['Signal ID'] = 'JD0_CLK_P'
+
+        self.assertEqual(list(self.descr['JP3'].written.keys()), [1])
+        for other in [self.descr['JP3'][1], list(self.descr['JP3'])[1], row]:
+            self.assertEqual(other['Note'], 'Beta only')
+            self.assertEqual(other['Signal ID'], 'JD0_CLK_P')
+        self.assertIsNone(self.descr['JP3'][0]['Note'])
+
+    def test_materialize(self):
+        self.descr['JP3'][0]['Signal ID'] = 'JD0_CLK_P'
+        self.assertEqual(self.descr.materialize(), {'JP3': [
+            {'Pigtail pin': 'A1', 'Pigtail slot': 'JP2', 'Note': None,
+             'Signal ID': 'JD0_CLK_P'},
+            {'Pigtail pin': 'A2', 'Pigtail slot': 'JP3', 'Note': 'Alpha only'}
+        ]})
+
+
+if __name__ == '__main__':
+    unittest.main()
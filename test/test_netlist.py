@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:41 AM +0000
+
+import sys
+sys.path.insert(0, '.')
+
+import re
+import unittest
+
+from backplane.netlist import ComponentClassifier, component_categories
+from backplane.netlist import RESISTOR, CAPACITOR, NET_TIE, RB, RBSP, RSP
+from backplane.netlist import CXRB, JP_GAMMA, JS
+
+designators = [
+    'R1', 'R23', 'C4', 'NT5', 'RB_6', 'RBSP7', 'RSP_8', 'CXRB_9',
+    'JP8', 'JP9', 'JP10', 'JP11', 'JS1', 'JSR', 'JP0', 'JP1', 'JD10',
+    'U1', 'XR1', 'RB1', 'RSP8', 'CX1', 'NT', 'R', 'R1A',
+]
+
+
+class ComponentClassifierTester(unittest.TestCase):
+    def setUp(self):
+        self.classifier = ComponentClassifier()
+
+    def test_categories(self):
+        expected = {
+            'R1': RESISTOR, 'R23': RESISTOR, 'R1A': RESISTOR,
+            'C4': CAPACITOR,
+            'NT5': NET_TIE,
+            'RB_6': RB,
+            'RBSP7': RBSP,
+            'RSP_8': RSP,
+            'CXRB_9': CXRB,
+            'JP8': JP_GAMMA, 'JP9': JP_GAMMA, 'JP10': JP_GAMMA,
+            'JP11': JP_GAMMA,
+            'JS1': JS, 'JSR': JS,
+        }
+        for comp in designators:
+            self.assertEqual(self.classifier.mask(comp),
+                             expected.get(comp, 0), comp)
+
+    def test_same_as_regexes(self):
+        for comp in designators:
+            mask = self.classifier.mask(comp)
+            for flag, regex in component_categories:
+                self.assertEqual(bool(mask & flag),
+                                 re.search(regex, comp) is not None,
+                                 (comp, regex))
+
+    def test_several_categories(self):
+        categories = [(1, r'^R\d+'), (2, r'^R1'), (4, r'^RB_\d+|^RBSP\d+'),
+                      (8, r'\d$')]
+        classifier = ComponentClassifier(categories)
+
+        self.assertEqual(classifier.mask('R1'), 1 | 2 | 8)
+        self.assertEqual(classifier.mask('R23'), 1 | 8)
+        self.assertEqual(classifier.mask('R1A'), 1 | 2)
+        self.assertEqual(classifier.mask('RB_1'), 4 | 8)
+        self.assertEqual(classifier.mask('RBSP2'), 4 | 8)
+        self.assertEqual(classifier.mask('JD0'), 8)
+        self.assertEqual(classifier.mask('JDX'), 0)
+
+        components = [('R1', '1'), ('RB_1', '2'), ('JDX', 'A1')]
+        self.assertTrue(classifier.any(components, 2))
+        self.assertTrue(classifier.any(components, 4 | 2))
+        self.assertFalse(classifier.any([('JDX', 'A1')], 1 | 2 | 4 | 8))
+
+    def test_classify_all(self):
+        netlist = {'A': [('R1', '1'), ('JP8', 'A1')], 'B': [('U1', '2')]}
+        self.classifier.classify_all(netlist)
+        self.assertEqual(self.classifier.masks,
+                         {'R1': RESISTOR, 'JP8': JP_GAMMA, 'U1': 0})
+
+    def test_matching(self):
+        components = [('JP10', 'A1'), ('JP1', 'A1'), ('RB_12', '1'),
+                      ('JP8', 'B2')]
+        self.assertEqual(self.classifier.matching(components, JP_GAMMA),
+                         ['JP10', 'JP8'])
+        self.assertEqual(self.classifier.matching(components, RB),
+                         ['RB_12'])
+        for flag, regex in component_categories:
+            self.assertEqual(
+                self.classifier.matching(components, flag),
+                [re.search(regex, comp).group() for comp, _ in components
+                 if re.search(regex, comp)])
+
+
+if __name__ == '__main__':
+    unittest.main()
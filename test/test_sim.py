@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+#
+# License: MIT
+# Last Change: Sun Oct 18, 2026 at 09:41 AM +0000
+
+import sys
+sys.path.insert(0, '.')
+
+import re
+import random
+import unittest
+
+from backplane.sim import DisjointSet, NetHopper
+
+passables = [r'^R\d+', r'^C\d+', r'^NT\d+', r'^CXRB_\d+',
+             r'^RB_\d+|^RBSP\d+']
+
+
+def reference_groups(netlist, passables):
+    # Transitive closure by breadth-first search: two nets are equivalent when
+    # a chain of passable components connects them.
+    regexes = [re.compile(p) for p in passables]
+
+    def passable(comp):
+        return any(r.search(comp) for r in regexes)
+
+    groups = []
+    visited = set()
+    for netname in netlist.keys():
+        if netname in visited:
+            continue
+        group = {netname}
+        queue = [netname]
+        while queue:
+            current = queue.pop()
+            comps = {c for c, _ in netlist[current] if passable(c)}
+            for other, components in netlist.items():
+                if other not in group and \
+                        comps & {c for c, _ in components}:
+                    group.add(other)
+                    queue.append(other)
+        visited |= group
+        groups.append(group)
+    return groups
+
+
+class DisjointSetTester(unittest.TestCase):
+    def test_singletons(self):
+        nets = DisjointSet()
+        for item in 'abc':
+            nets.add(item)
+        self.assertEqual(len({nets.find(i) for i in 'abc'}), 3)
+
+    def test_union(self):
+        nets = DisjointSet()
+        for item in 'abcde':
+            nets.add(item)
+        nets.union('a', 'b')
+        nets.union('c', 'd')
+        nets.union('b', 'd')
+
+        self.assertEqual(len({nets.find(i) for i in 'abcd'}), 1)
+        self.assertNotEqual(nets.find('e'), nets.find('a'))
+        self.assertEqual(nets.size[nets.find('a')], 4)
+
+    def test_union_is_idempotent(self):
+        nets = DisjointSet()
+        nets.add('a')
+        nets.add('b')
+        root = nets.union('a', 'b')
+        self.assertEqual(nets.union('b', 'a'), root)
+        self.assertEqual(nets.size[root], 2)
+
+    def test_add_twice(self):
+        nets = DisjointSet()
+        nets.add('a')
+        nets.add('b')
+        nets.union('a', 'b')
+        nets.add('a')  # Must not split 'a' from its set
+        self.assertEqual(nets.find('a'), nets.find('b'))
+
+
+class NetHopperTester(unittest.TestCase):
+    def setUp(self):
+        self.hopper = NetHopper(passables)
+
+    def test_chain(self):
+        netlist = {
+            'A': [('JD0', 'A1'), ('R1', '1')],
+            'B': [('R1', '2'), ('C2', '1')],
+            'C': [('C2', '2'), ('NT3', '1')],
+            'D': [('NT3', '2'), ('JP0', 'A1')],
+        }
+        self.assertEqual(self.hopper.do(netlist), [['A', 'B', 'C', 'D']])
+
+    def test_cycle(self):
+        netlist = {
+            'A': [('R1', '1'), ('R3', '2')],
+            'B': [('R1', '2'), ('R2', '1')],
+            'C': [('R2', '2'), ('R3', '1')],
+            'D': [('JD0', 'A1')],
+        }
+        self.assertEqual(self.hopper.do(netlist), [['A', 'B', 'C'], ['D']])
+
+    def test_non_passable(self):
+        # Connectors, ICs and 'RSP_' resistors don't connect nets, and
+        # passables must match from the start of the designator.
+        netlist = {
+            'A': [('JD0', 'A1'), ('U1', '1'), ('RSP_1', '1'), ('XR1', '1')],
+            'B': [('JD0', 'A2'), ('U1', '2'), ('RSP_1', '2'), ('XR1', '2')],
+            'C': [('RB_1', '1'), ('JP0', 'A1')],
+            'D': [('RB_1', '2'), ('RBSP2', '1')],
+            'E': [('RBSP2', '2'), ('CXRB_3', '1')],
+            'F': [('CXRB_3', '2')],
+        }
+        self.assertEqual(self.hopper.do(netlist),
+                         [['A'], ['B'], ['C', 'D', 'E', 'F']])
+
+    def test_hop(self):
+        netlist = {
+            'A': [('JD0', 'A1'), ('R1', '1')],
+            'B': [('R1', '2'), ('JP0', 'A1')],
+            'C': [('JD0', 'A2')],
+        }
+        groups = self.hopper.hop(netlist)
+
+        self.assertEqual(groups, [['A', 'B'], ['C']])
+        merged = [('JD0', 'A1'), ('R1', '1'), ('R1', '2'), ('JP0', 'A1')]
+        self.assertEqual(netlist['A'], merged)
+        self.assertIs(netlist['A'], netlist['B'])
+        self.assertEqual(netlist['C'], [('JD0', 'A2')])
+
+    def test_hop_drops_duplicate_nodes(self):
+        netlist = {
+            'A': [('R1', '1'), ('C1', '1')],
+            'B': [('R1', '1'), ('C1', '2')],
+        }
+        self.hopper.hop(netlist)
+        self.assertEqual(netlist['A'],
+                         [('R1', '1'), ('C1', '1'), ('C1', '2')])
+
+    def test_random_netlists(self):
+        rng = random.Random(0)
+        comps = ['R{}'.format(i) for i in range(8)] + \
+            ['C{}'.format(i) for i in range(4)] + \
+            ['JD{}'.format(i) for i in range(4)] + ['U1', 'RSP_1']
+
+        for _ in range(50):
+            netlist = {}
+            for idx in range(rng.randint(1, 20)):
+                netlist['N{}'.format(idx)] = [
+                    (rng.choice(comps), str(pin))
+                    for pin in range(rng.randint(1, 3))]
+
+            groups = self.hopper.do(netlist)
+            self.assertEqual(sorted(map(sorted, groups)),
+                             sorted(map(sorted, reference_groups(
+                                 netlist, passables))))
+            # Every net is in exactly one group, in the order of 'netlist'.
+            self.assertEqual(sorted(n for g in groups for n in g),
+                             sorted(netlist.keys()))
+            for group in groups:
+                order = list(netlist.keys())
+                self.assertEqual(group, sorted(group, key=order.index))
+
+
+if __name__ == '__main__':
+    unittest.main()